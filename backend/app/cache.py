@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import case, func
+
+from .database import SessionLocal
+from .metrics import CACHE_EVICTIONS, CACHE_LOOKUPS
+from .models import CacheUsage, ScoreCacheEntry, TextCacheEntry
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+TEXT_CACHE_ENABLED = os.environ.get("TEXT_CACHE_ENABLED", "1") == "1"
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("TEXT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Only bump last_accessed when it is older than this, so hot entries do not
+# turn every cache read into a write.
+_TOUCH_INTERVAL = 60
+
+# cache_usage rows holding each cache's running size
+_SCORE_USAGE = "llm_score"
+_TEXT_USAGE = "extracted_text"
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for a cache"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    def record_hit(self, saved_seconds=0.0):
+        CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += saved_seconds
+
+    def record_miss(self):
+        CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+        with self._lock:
+            self.misses += 1
+
+    def record_evictions(self, count):
+        CACHE_EVICTIONS.inc(count, cache=self.name)
+        with self._lock:
+            self.evictions += count
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 2),
+            }
+
+
+score_cache_stats = CacheStats("llm_score")
+text_cache_stats = CacheStats("extracted_text")
+
+
+def score_cache_key(jd, resume_text, model, prompt_version):
+    """Content address for an LLM scoring call (inputs must already be truncated)"""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model, jd, resume_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_cached_score(key):
+    """Return the cached result dict for key, or None on miss/expiry"""
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    db = SessionLocal()
+    try:
+        entry = db.get(ScoreCacheEntry, key)
+        now = time.time()
+        if entry is None or now - entry.created_at > LLM_CACHE_TTL:
+            score_cache_stats.record_miss()
+            return None
+
+        if now - entry.last_accessed > _TOUCH_INTERVAL:
+            entry.last_accessed = now
+            db.commit()
+
+        score_cache_stats.record_hit(entry.latency or 0.0)
+        return json.loads(entry.result)
+    except Exception as e:
+        logger.error(f"Score cache lookup failed: {e}")
+        score_cache_stats.record_miss()
+        return None
+    finally:
+        db.close()
+
+
+def store_cached_score(key, result, latency=0.0):
+    """Persist an LLM result and evict expired / least recently used entries"""
+    if not LLM_CACHE_ENABLED:
+        return
+
+    db = SessionLocal()
+    try:
+        now = time.time()
+        existed = db.query(ScoreCacheEntry.key).filter(ScoreCacheEntry.key == key).first() is not None
+        db.merge(ScoreCacheEntry(
+            key=key,
+            result=json.dumps(result),
+            latency=latency,
+            created_at=now,
+            last_accessed=now
+        ))
+        count = _adjust_usage(
+            db, _SCORE_USAGE, CacheUsage.entries, 0 if existed else 1,
+            lambda: db.query(ScoreCacheEntry).count()
+        )
+        db.commit()
+        _evict_scores(db, now, count)
+    except Exception as e:
+        logger.error(f"Score cache store failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _evict_scores(db, now, count):
+    evicted = db.query(ScoreCacheEntry).filter(
+        ScoreCacheEntry.created_at < now - LLM_CACHE_TTL
+    ).delete(synchronize_session=False)
+
+    excess = count - evicted - LLM_CACHE_MAX_ENTRIES
+    if excess > 0:
+        oldest = db.query(ScoreCacheEntry.key).order_by(
+            ScoreCacheEntry.last_accessed.asc()
+        ).limit(excess)
+        evicted += db.query(ScoreCacheEntry).filter(
+            ScoreCacheEntry.key.in_(oldest.scalar_subquery())
+        ).delete(synchronize_session=False)
+
+    if evicted:
+        _adjust_usage(db, _SCORE_USAGE, CacheUsage.entries, -evicted)
+        db.commit()
+        score_cache_stats.record_evictions(evicted)
+        logger.info(f"Evicted {evicted} score cache entries")
+
+
+def get_cached_text(content_hash):
+    """Return (text, name) extracted earlier from identical file bytes, or None"""
+    if not TEXT_CACHE_ENABLED or not content_hash:
+        return None
+
+    db = SessionLocal()
+    try:
+        entry = db.get(TextCacheEntry, content_hash)
+        if entry is None:
+            text_cache_stats.record_miss()
+            return None
+
+        now = time.time()
+        if now - entry.last_accessed > _TOUCH_INTERVAL:
+            entry.last_accessed = now
+            db.commit()
+
+        text_cache_stats.record_hit()
+        return entry.text, entry.name
+    except Exception as e:
+        logger.error(f"Text cache lookup failed: {e}")
+        text_cache_stats.record_miss()
+        return None
+    finally:
+        db.close()
+
+
+def store_cached_text(content_hash, text, name):
+    """Persist extracted text and name, evicting LRU entries over the size cap"""
+    if not TEXT_CACHE_ENABLED or not content_hash:
+        return
+
+    db = SessionLocal()
+    try:
+        previous = db.query(TextCacheEntry.size).filter(
+            TextCacheEntry.content_hash == content_hash
+        ).scalar() or 0
+        db.merge(TextCacheEntry(
+            content_hash=content_hash,
+            text=text,
+            name=name,
+            size=len(text),
+            last_accessed=time.time()
+        ))
+        total = _adjust_usage(
+            db, _TEXT_USAGE, CacheUsage.bytes, len(text) - previous,
+            lambda: db.query(func.sum(TextCacheEntry.size)).scalar() or 0
+        )
+        db.commit()
+        if total > TEXT_CACHE_MAX_BYTES:
+            _evict_texts(db, total - TEXT_CACHE_MAX_BYTES)
+    except Exception as e:
+        logger.error(f"Text cache store failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _adjust_usage(db, name, column, delta, seed=None):
+    """
+    Add delta to a cache's running total (`column` of its cache_usage row)
+    and return the new total. The first time the row is missing it is
+    seeded from seed(), which counts the cache once; the pending change is
+    flushed first, so the count already includes it.
+    """
+    usage = db.get(CacheUsage, name)
+    if usage is None:
+        db.flush()
+        total = seed() if seed is not None else 0
+        db.add(CacheUsage(name=name, **{column.key: total}))
+        return total
+    db.query(CacheUsage).filter(CacheUsage.name == name).update(
+        {column: case((column + delta < 0, 0), else_=column + delta)},
+        synchronize_session=False
+    )
+    db.flush()
+    db.refresh(usage)
+    return getattr(usage, column.key)
+
+
+def _evict_texts(db, excess):
+    victims = []
+    freed = 0
+    for content_hash, size in db.query(
+        TextCacheEntry.content_hash, TextCacheEntry.size
+    ).order_by(TextCacheEntry.last_accessed.asc()).yield_per(500):
+        victims.append(content_hash)
+        freed += size
+        if freed >= excess:
+            break
+
+    db.query(TextCacheEntry).filter(
+        TextCacheEntry.content_hash.in_(victims)
+    ).delete(synchronize_session=False)
+    _adjust_usage(db, _TEXT_USAGE, CacheUsage.bytes, -freed)
+    db.commit()
+    text_cache_stats.record_evictions(len(victims))
+    logger.info(f"Evicted {len(victims)} text cache entries")
+
+
+def cache_stats():
+    """Counters for every cache, keyed by cache name"""
+    return {
+        stats.name: stats.snapshot()
+        for stats in (score_cache_stats, text_cache_stats)
+    }
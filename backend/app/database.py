@@ -1,12 +1,134 @@
-from sqlalchemy import create_engine
+import logging
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine, event, inspect, literal, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./hr.db"
+from .metrics import DB_COMMIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./hr.db")
+
+# "performance" turns on WAL and the pragmas below for SQLite; "default"
+# keeps SQLite's stock settings. Ignored for other databases.
+DB_PROFILE = os.environ.get("DB_PROFILE", "performance")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets /job-status readers run while a worker holds the write lock
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Safe under WAL: a crash can lose the last commits, never corrupt the file
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _create_engine(url):
+    pool_args = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+    }
+
+    if url.startswith("sqlite"):
+        if ":memory:" in url or url.rstrip("/") == "sqlite:":
+            return create_engine(url, connect_args={"check_same_thread": False})
+
+        sqlite_engine = create_engine(
+            url,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000
+            },
+            **pool_args
+        )
+        if DB_PROFILE == "performance":
+            event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+        return sqlite_engine
+
+    # Server databases (e.g. postgresql://...): pooled connections that are
+    # checked before use and recycled before server-side idle timeouts.
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
+        **pool_args
+    )
+
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+engine = _create_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
+
+
+def _commit_started(session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+
+event.listen(SessionLocal, "before_commit", _commit_started)
+event.listen(SessionLocal, "after_commit", _commit_finished)
+
+
+def migrate():
+    """
+    Bring a database up to the current models. Creates missing tables, and
+    for existing hr.db files adds new columns and indexes (create_all never
+    alters existing tables). Safe to run repeatedly.
+    """
+    from . import models  # noqa: F401  (registers tables on Base)
+
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                if column.default is not None and column.default.is_scalar:
+                    # Existing rows get the model default instead of NULL
+                    default = literal(column.default.arg, column.type).compile(
+                        dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    column_type = f"{column_type} DEFAULT {default}"
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                logger.info(f"Added column {table.name}.{column.name}")
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn, checkfirst=True)
+                    logger.info(f"Created index {index.name}")
+
+
+if __name__ == "__main__":
+    # python -m app.database migrate
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] != ["migrate"]:
+        sys.exit("usage: python -m app.database migrate")
+    # Run through the package module so models register on the same Base
+    from . import database
+    database.migrate()
+    logger.info(f"Database at {DATABASE_URL} is up to date")
@@ -0,0 +1,212 @@
+"""
+Near-duplicate resume detection with MinHash and LSH.
+
+Candidates often apply several times with slightly edited CVs. Each
+LLM-scored resume gets a MinHash signature over word shingles of its
+normalized text. The signature is stored with its LSH band keys in
+resume_fingerprints / lsh_buckets. Before a resume is scored, its bands
+are looked up. If an earlier resume in the same scope has an estimated
+Jaccard similarity of at least DEDUP_THRESHOLD, its score is reused and
+the new Candidate is linked to it through duplicate_of, instead of making
+another LLM call.
+
+A scope is the JD, scoring backend and prompt version, so matches come
+from the same job or from past jobs with the same JD. Only resumes whose
+original is already written are caught; two copies scored at the same
+moment are both scored. The upload janitor prunes old fingerprints and
+those of deleted candidates (prune_fingerprints).
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+import zlib
+from functools import lru_cache
+
+from sqlalchemy import delete, exists, insert, or_, select
+
+from .llm_service import PROMPT_VERSION
+from .metrics import DUPLICATES_REUSED
+from .models import Candidate, LshBucket, ResumeFingerprint
+from .scoring_backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "1") == "1"
+# Estimated Jaccard similarity of word shingles above which a resume counts
+# as a duplicate
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.9"))
+
+MINHASH_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs with similarity 0.9 share a band with
+# probability > 0.9999, pairs at 0.5 only ~6% of the time.
+LSH_BANDS = 16
+SHINGLE_WORDS = 3
+# Resumes sharing bands with more stored fingerprints than this are only
+# compared against the first ones found
+MAX_LSH_MATCHES = 50
+# Fingerprints older than this many seconds are pruned (0 keeps them), as
+# are the oldest beyond DEDUP_MAX_FINGERPRINTS (0 for no cap)
+DEDUP_MAX_AGE = float(os.environ.get("DEDUP_MAX_AGE", str(90 * 24 * 3600)))
+DEDUP_MAX_FINGERPRINTS = int(os.environ.get("DEDUP_MAX_FINGERPRINTS", "100000"))
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_CHUNK = 4096
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text):
+    """Overlapping SHINGLE_WORDS-word sequences of the lowercased, punctuation-free text"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+@lru_cache(maxsize=None)
+def _permutations():
+    """(a, b) of the hash functions (a * x + b) mod p, loading NumPy on first use"""
+    import numpy as np
+
+    # Fixed seed: signatures are persisted and compared across processes
+    rng = np.random.default_rng(20240611)
+    return (
+        rng.integers(1, 1 << 31, MINHASH_PERMUTATIONS, dtype=np.uint64),
+        rng.integers(0, 1 << 31, MINHASH_PERMUTATIONS, dtype=np.uint64)
+    )
+
+
+def minhash_signature(text):
+    """MINHASH_PERMUTATIONS uint64 minimums, or None for text without words"""
+    import numpy as np
+
+    a, b = _permutations()
+    hashed = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)), dtype=np.uint64
+    )
+    if not hashed.size:
+        return None
+    signature = np.full(MINHASH_PERMUTATIONS, _MERSENNE_PRIME, dtype=np.uint64)
+    # Chunked, so full-text PDFs do not allocate a (shingles x permutations) matrix at once
+    for start in range(0, hashed.size, _HASH_CHUNK):
+        chunk = hashed[start:start + _HASH_CHUNK, None]
+        np.minimum(signature, ((chunk * a + b) % _MERSENNE_PRIME).min(axis=0), out=signature)
+    return signature
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of the two signatures' shingle sets"""
+    import numpy as np
+
+    return float(np.count_nonzero(signature == other)) / MINHASH_PERMUTATIONS
+
+
+def band_keys(scope, signature):
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    return [
+        hashlib.blake2b(
+            signature[band * rows:(band + 1) * rows].tobytes(),
+            digest_size=8,
+            person=band.to_bytes(2, "big"),
+            key=scope.encode("utf-8")
+        ).hexdigest()
+        for band in range(LSH_BANDS)
+    ]
+
+
+def scoring_scope(jd, backend=None):
+    """Scores are interchangeable only within one (prompt, backend, JD) scope"""
+    digest = hashlib.sha256()
+    for part in (PROMPT_VERSION, get_backend(backend).cache_id, jd.text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def find_duplicate(db, scope, signature, job_id=None):
+    """
+    The Candidate of the most similar earlier resume in `scope`, or None.
+    Counts the match as same_job or past_job relative to job_id.
+    """
+    import numpy as np
+
+    rows = (
+        db.query(ResumeFingerprint.candidate_id, ResumeFingerprint.job_id, ResumeFingerprint.signature)
+        .join(LshBucket, LshBucket.fingerprint_id == ResumeFingerprint.id)
+        .filter(LshBucket.band_key.in_(band_keys(scope, signature)))
+        .distinct()
+        .limit(MAX_LSH_MATCHES)
+        .all()
+    )
+    best = None
+    best_similarity = DEDUP_THRESHOLD
+    for candidate_id, original_job_id, stored in rows:
+        score = similarity(signature, np.frombuffer(stored, dtype=np.uint64))
+        if score >= best_similarity:
+            best, best_similarity = (candidate_id, original_job_id), score
+    if best is None:
+        return None
+
+    candidate = db.query(Candidate).filter(Candidate.id == best[0]).first()
+    if candidate is not None:
+        DUPLICATES_REUSED.inc(match="same_job" if best[1] == job_id else "past_job")
+        logger.info(f"Near-duplicate of candidate {candidate.id} (similarity {best_similarity:.2f})")
+    return candidate
+
+
+def register_fingerprints(db, entries):
+    """
+    Index scored resumes in the caller's transaction. entries are
+    (candidate_id, job_id, scope, signature) tuples.
+    """
+    if not entries:
+        return
+    now = time.time()
+    fingerprint_ids = db.execute(
+        insert(ResumeFingerprint).returning(ResumeFingerprint.id, sort_by_parameter_order=True),
+        [
+            {
+                "candidate_id": candidate_id,
+                "job_id": job_id,
+                "scope": scope,
+                "signature": signature.tobytes(),
+                "created_at": now
+            }
+            for candidate_id, job_id, scope, signature in entries
+        ]
+    ).scalars().all()
+    db.execute(insert(LshBucket), [
+        {"band_key": key, "fingerprint_id": fingerprint_id}
+        for fingerprint_id, (_, _, scope, signature) in zip(fingerprint_ids, entries)
+        for key in band_keys(scope, signature)
+    ])
+
+
+def _delete_fingerprints(db, ids):
+    """Delete the fingerprints selected by `ids` (a SELECT of ids) and their bands"""
+    db.execute(delete(LshBucket).where(LshBucket.fingerprint_id.in_(ids)))
+    return db.execute(delete(ResumeFingerprint).where(ResumeFingerprint.id.in_(ids))).rowcount
+
+
+def prune_fingerprints(db):
+    """
+    Remove fingerprints whose Candidate is gone, older than DEDUP_MAX_AGE,
+    or the oldest beyond DEDUP_MAX_FINGERPRINTS. Returns the number removed.
+    """
+    stale = ~exists().where(Candidate.id == ResumeFingerprint.candidate_id)
+    if DEDUP_MAX_AGE > 0:
+        stale = or_(stale, ResumeFingerprint.created_at < time.time() - DEDUP_MAX_AGE)
+    removed = _delete_fingerprints(db, select(ResumeFingerprint.id).where(stale))
+
+    if DEDUP_MAX_FINGERPRINTS > 0:
+        excess = db.query(ResumeFingerprint).count() - DEDUP_MAX_FINGERPRINTS
+        if excess > 0:
+            removed += _delete_fingerprints(db, select(ResumeFingerprint.id).order_by(
+                ResumeFingerprint.created_at, ResumeFingerprint.id
+            ).limit(excess))
+    db.commit()
+    if removed:
+        logger.info(f"Pruned {removed} resume fingerprints")
+    return removed
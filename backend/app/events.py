@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class JobEventBroker:
+    """
+    In-process pub/sub between queue workers (threads) and SSE streams
+    (event loop). Publishing never blocks a worker. Queues are unbounded,
+    but a job emits at most one event per file plus a final status.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, job_id):
+        """Register the calling event loop for job_id events. Returns the queue to read."""
+        queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[job_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, job_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def has_subscribers(self, job_id):
+        with self._lock:
+            return bool(self._subscribers.get(job_id))
+
+    def publish(self, job_id, event):
+        """Thread-safe; a no-op when nobody is watching the job"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's loop already closed
+                self.unsubscribe(job_id, (loop, queue))
+
+
+def candidate_payload(candidate):
+    return {
+        "id": candidate.id,
+        "name": candidate.name,
+        "score": float(f"{candidate.score:.1f}"),
+        "classification": candidate.classification,
+        "summary": candidate.summary,
+        "duplicate_of": candidate.duplicate_of,
+        "scored_locally": bool(candidate.scored_locally)
+    }
+
+
+broker = JobEventBroker()
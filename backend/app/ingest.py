@@ -0,0 +1,362 @@
+"""
+Bulk ingestion of resumes from a ZIP archive or a server-side directory.
+
+Members are streamed one at a time into the content-addressed upload
+layout and enqueued in chunks, so workers start scoring while the rest of
+the archive is still being read. The job stays in status "ingesting" (its
+total_files growing per chunk) until the last chunk is enqueued. Unless the
+job is pre-ranked, ingestion pauses while BULK_MAX_PENDING_FILES files are
+waiting, which bounds both memory and the disk used by unpacked members.
+
+Each chunk also records how many source members were consumed, and the
+ingesting thread keeps a heartbeat on the job. recover_ingests(), run at
+API and worker startup, resumes jobs whose heartbeat went stale from that
+position, or finishes them with the files already enqueued if their source
+is gone.
+
+    python -m app.ingest resumes.zip --jd-file jd.txt [--top-k 50] [--process]
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+import zipfile
+
+from sqlalchemy import and_, or_
+
+from .database import SessionLocal, migrate
+from .job_service import PRERANK_TOP_K, prerank_top_k_for
+from .models import Job
+from .task_queue import enqueue_tasks, finalize_job, unfinished_count
+from .upload_service import (
+    ALLOWED_EXTENSIONS, MAX_UPLOAD_FILE_BYTES, commit_upload, discard_staged, stage_stream
+)
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", "50"))
+BULK_MAX_PENDING_FILES = int(os.environ.get("BULK_MAX_PENDING_FILES", "200"))
+BULK_BACKPRESSURE_POLL = 1.0
+BULK_MAX_ARCHIVE_BYTES = int(os.environ.get("BULK_MAX_ARCHIVE_BYTES", str(2 * 1024 * 1024 * 1024)))
+# Directory imports through the API are refused unless they resolve inside
+# this root; the CLI can read any directory its user can.
+BULK_IMPORT_ROOT = os.environ.get("BULK_IMPORT_ROOT", "")
+# Ingestion refreshes its job's heartbeat this often; a job in "ingesting"
+# whose heartbeat is older than INGEST_STALE_SECONDS is taken over.
+INGEST_HEARTBEAT_SECONDS = 10
+INGEST_STALE_SECONDS = int(os.environ.get("INGEST_STALE_SECONDS", "120"))
+
+
+def _wanted(name):
+    base = os.path.basename(name)
+    return (
+        not base.startswith(".")
+        and "__MACOSX/" not in name
+        and os.path.splitext(base)[1].lower() in ALLOWED_EXTENSIONS
+    )
+
+
+def iter_zip(path):
+    """Yield (member name, open binary stream) for each resume in a ZIP archive"""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not _wanted(info.filename):
+                continue
+            if info.file_size > MAX_UPLOAD_FILE_BYTES:
+                logger.warning(f"Skipping {info.filename}: {info.file_size} bytes uncompressed")
+                continue
+            try:
+                with archive.open(info) as member:
+                    yield info.filename, member
+            except (RuntimeError, zipfile.BadZipFile, NotImplementedError) as e:
+                # Encrypted members, unsupported compression, corrupt entries
+                logger.warning(f"Skipping {info.filename}: {e}")
+
+
+def iter_directory(path):
+    """Yield (relative path, open binary stream) for each resume under a directory"""
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            if not _wanted(full_path):
+                continue
+            try:
+                with open(full_path, "rb") as stream:
+                    yield os.path.relpath(full_path, path), stream
+            except OSError as e:
+                logger.warning(f"Skipping {full_path}: {e}")
+
+
+def iter_source(source):
+    if os.path.isdir(source):
+        return iter_directory(source)
+    if zipfile.is_zipfile(source):
+        return iter_zip(source)
+    raise ValueError(f"{source} is neither a directory nor a ZIP archive")
+
+
+def resolve_import_directory(directory):
+    """The real path of an API directory import, or ValueError if not allowed"""
+    if not BULK_IMPORT_ROOT:
+        raise ValueError("Directory imports are disabled (set BULK_IMPORT_ROOT)")
+    root = os.path.realpath(BULK_IMPORT_ROOT)
+    path = os.path.realpath(os.path.join(root, directory))
+    if os.path.commonpath([root, path]) != root or not os.path.isdir(path):
+        raise ValueError(f"{directory} is not a directory under the import root")
+    return path
+
+
+def create_bulk_job(jd, backend=None):
+    """Create a job in status "ingesting"; ingest() fills it"""
+    db = SessionLocal()
+    try:
+        job = Job(
+            status="ingesting", total_files=0, processed_files=0, jd=jd, scoring_backend=backend,
+            ingest_heartbeat_at=time.time()
+        )
+        db.add(job)
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+
+def _update_job(job_id, **values):
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _wait_for_capacity(job_id):
+    last_beat = time.time()
+    while True:
+        db = SessionLocal()
+        try:
+            if unfinished_count(db, job_id) < BULK_MAX_PENDING_FILES:
+                return
+        finally:
+            db.close()
+        if time.time() - last_beat >= INGEST_HEARTBEAT_SECONDS:
+            last_beat = time.time()
+            _update_job(job_id, ingest_heartbeat_at=last_beat)
+        time.sleep(BULK_BACKPRESSURE_POLL)
+
+
+def _enqueue_chunk(job_id, chunk, first_position, source_position):
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        enqueue_tasks(db, job_id, [path for path, _ in chunk], [file_hash for _, file_hash in chunk], first_position)
+        job.total_files = (job.total_files or 0) + len(chunk)
+        # Committed with the tasks: a resumed ingest skips exactly these members
+        job.ingest_position = source_position
+        job.ingest_heartbeat_at = time.time()
+        db.commit()
+    finally:
+        db.close()
+
+
+def ingest(job_id, source, top_k=None, chunk_size=BULK_CHUNK_SIZE, remove_source=False):
+    """
+    Stream every resume in `source` (ZIP or directory) into job `job_id`,
+    then hand the job to the normal finalize/pre-rank flow. Continues after
+    the job's recorded ingest_position, so an interrupted ingest can be
+    run again. Returns the number of files in the job.
+    """
+    # Pre-ranking needs every file before any is scored, so a pre-ranked job
+    # holds its tasks back (and cannot apply backpressure) until ingested.
+    top_k = PRERANK_TOP_K if top_k is None else top_k
+    backpressure = top_k <= 0
+
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        total = job.total_files or 0
+        skip = job.ingest_position or 0
+        job.ingest_source = os.path.abspath(source)
+        job.ingest_remove_source = remove_source
+        job.ingest_heartbeat_at = time.time()
+        if top_k > 0:
+            job.prerank_top_k = top_k
+        db.commit()
+    finally:
+        db.close()
+    if skip:
+        logger.info(f"Job {job_id}: resuming ingestion of {source} after {skip} entries ({total} files)")
+
+    position = 0
+    last_beat = time.time()
+    chunk = []
+    start_time = time.time()
+    try:
+        for name, stream in iter_source(source):
+            position += 1
+            if position <= skip:
+                continue
+            if time.time() - last_beat >= INGEST_HEARTBEAT_SECONDS:
+                last_beat = time.time()
+                _update_job(job_id, ingest_heartbeat_at=last_beat)
+            try:
+                staged_path, file_hash, _ = stage_stream(stream, name)
+            except (ValueError, OSError, zipfile.BadZipFile) as e:
+                logger.warning(f"Skipping {name}: {e}")
+                continue
+            chunk.append((commit_upload(job_id, staged_path, file_hash, name), file_hash))
+
+            if len(chunk) >= chunk_size:
+                if backpressure:
+                    _wait_for_capacity(job_id)
+                _enqueue_chunk(job_id, chunk, total + 1, position)
+                total += len(chunk)
+                chunk = []
+                last_beat = time.time()
+                logger.info(f"Job {job_id}: {total} files ingested")
+
+        if chunk:
+            _enqueue_chunk(job_id, chunk, total + 1, position)
+            total += len(chunk)
+    except Exception as e:
+        logger.error(f"Ingestion of {source} into job {job_id} failed after {total} files: {e}")
+        discard_staged([path for path, _ in chunk])
+        raise
+    finally:
+        _finish_ingest(job_id, total, top_k)
+        if remove_source:
+            discard_staged([source])
+
+    logger.info(f"Job {job_id}: ingested {total} files from {source} in {time.time() - start_time:.2f}s")
+    return total
+
+
+def recover_ingests(stale_after=INGEST_STALE_SECONDS):
+    """
+    Take over "ingesting" jobs whose ingestion stopped making progress
+    (its process died): resume them in background threads, or, if their
+    source is gone, finish them with the files already enqueued. Returns
+    the ids of the jobs taken over.
+    """
+    def stale(now):
+        return and_(
+            Job.status == "ingesting",
+            or_(Job.ingest_heartbeat_at.is_(None), Job.ingest_heartbeat_at < now - stale_after)
+        )
+
+    now = time.time()
+    claimed = []
+    db = SessionLocal()
+    try:
+        for job in db.query(Job).filter(stale(now)).all():
+            # Several processes may start at once; only one takes each job
+            won = db.query(Job).filter(Job.id == job.id, stale(now)).update(
+                {"ingest_heartbeat_at": now}, synchronize_session=False
+            )
+            db.commit()
+            if won:
+                claimed.append(
+                    (job.id, job.ingest_source, job.prerank_top_k, job.ingest_remove_source, job.total_files)
+                )
+    finally:
+        db.close()
+
+    for job_id, source, top_k, remove_source, total in claimed:
+        if source and os.path.exists(source):
+            logger.warning(f"Resuming interrupted ingestion of job {job_id} from {source}")
+            start_ingest(job_id, source, top_k or 0, remove_source=bool(remove_source))
+        else:
+            logger.warning(f"Source of interrupted job {job_id} is gone; keeping its {total or 0} files")
+            _finish_ingest(job_id, total or 0, top_k or 0)
+    return [job_id for job_id, *_ in claimed]
+
+
+def _finish_ingest(job_id, total, top_k):
+    db = SessionLocal()
+    try:
+        values = {
+            "status": "processing" if total else "failed",
+            # Small archives may not need the pre-ranking asked for
+            "prerank_top_k": prerank_top_k_for(total, top_k),
+        }
+        db.query(Job).filter(Job.id == job_id, Job.status == "ingesting").update(values)
+        db.commit()
+        # Workers may already have finished every task
+        if total:
+            finalize_job(db, job_id)
+    finally:
+        db.close()
+
+
+def start_ingest(job_id, source, top_k=None, remove_source=False):
+    """Run ingest() in a background thread (used by the API)"""
+    def run():
+        try:
+            ingest(job_id, source, top_k, remove_source=remove_source)
+        except Exception:
+            pass  # already logged; the job was marked processing/failed
+
+    thread = threading.Thread(target=run, name=f"ingest-{job_id}", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a job from a ZIP archive or directory of resumes")
+    parser.add_argument("source", help="ZIP archive or directory")
+    jd_group = parser.add_mutually_exclusive_group(required=True)
+    jd_group.add_argument("--jd", help="job description text")
+    jd_group.add_argument("--jd-file", help="file containing the job description")
+    parser.add_argument("--top-k", type=int, default=None, help="only score the best K locally ranked files with the LLM")
+    parser.add_argument("--backend", default=None, help="scoring backend (see app.scoring_backends)")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--process", action="store_true",
+                        help="also run queue workers in this process until the job finishes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    migrate()
+
+    if args.jd_file:
+        with open(args.jd_file, encoding="utf-8") as f:
+            jd = f.read()
+    else:
+        jd = args.jd
+    if not jd.strip():
+        parser.error("the job description is empty")
+    if args.backend:
+        from .scoring_backends import get_backend
+        try:
+            get_backend(args.backend)
+        except ValueError as e:
+            parser.error(str(e))
+
+    job_id = create_bulk_job(jd, args.backend)
+    print(f"Created job {job_id}")
+
+    stop_event = threading.Event()
+    if args.process:
+        from .worker import start_workers
+        start_workers(stop_event, name="ingest")
+
+    try:
+        total = ingest(job_id, args.source, args.top_k, args.chunk_size)
+        print(f"Job {job_id}: {total} files enqueued")
+        while args.process:
+            db = SessionLocal()
+            try:
+                job = db.query(Job).filter(Job.id == job_id).first()
+                if job.status not in ("ingesting", "processing"):
+                    print(f"Job {job_id} {job.status}: {job.processed_files}/{job.total_files} files")
+                    break
+            finally:
+                db.close()
+            time.sleep(2)
+    finally:
+        stop_event.set()
+
+
+if __name__ == "__main__":
+    main()
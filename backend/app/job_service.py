@@ -1,129 +1,481 @@
-from .resume_parser import extract_text, extract_name_from_text
-from .llm_service import score_resume
+from .resume_parser import (
+    DOCX_MAX_CHARS, PAGE_BREAK, PDF_MAX_CHARS, extract_text, extract_name_from_text, extract_pdf_pages, pdf_page_count
+)
+from .llm_service import compile_jd, score_resume, score_resumes
+from .dedup import DEDUP_ENABLED, find_duplicate, minhash_signature, scoring_scope
 from .database import SessionLocal
-from .models import Candidate, Job
-from .utils import timing_decorator, log_performance_metrics
+from .models import Job, JobTask
+from .utils import timing_decorator
+from .metrics import EXTRACTION_SECONDS, span
+from .cache import get_cached_text, store_cached_text
+from .result_writer import result_writer
+from .task_queue import (
+    TASK_MAX_ATTEMPTS, enqueue_tasks, claim_tasks, claim_ranking, complete_ranking,
+    keep_lease, release_ranking, renew_ranking, renew_tasks, unfinished_count
+)
+from .ranking import classify_score, select_top_k
 
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import logging
+import multiprocessing
 import os
+import sys
+import threading
 import time
 import traceback
 
 logger = logging.getLogger(__name__)
 
 
-@timing_decorator
-def process_job(job_id, jd, file_paths):
+# Bounded pipeline: extraction is CPU-bound (pdfplumber) and runs in a process
+# pool, scoring is network-bound and runs on worker threads, SCORING_CONCURRENCY
+# per process by default.
+SCORING_CONCURRENCY = int(os.environ.get("SCORING_CONCURRENCY", "4"))
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Resumes per scoring call; 1 keeps the one-call-per-file behaviour.
+LLM_BATCH_SIZE = int(os.environ.get("LLM_BATCH_SIZE", "1"))
+
+# Default for jobs that do not set top_k: only this many best locally ranked
+# files per job are scored by the LLM (0 scores every file with the LLM).
+PRERANK_TOP_K = int(os.environ.get("PRERANK_TOP_K", "0"))
+
+# When PDFs are read in full (PDF_MAX_CHARS=0), ones with at least this many
+# pages are split into page ranges extracted in parallel by the pool.
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "8"))
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+# A pool that breaks before any worker ever returned a result cannot start
+# (see process_job); extraction then stays in-thread for this process.
+_extraction_pool_worked = False
+_extraction_pool_disabled = False
+
+
+def _get_extraction_pool():
+    """Lazily create the shared extraction process pool; None if disabled"""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool_disabled:
+            return None
+        if _extraction_pool is None:
+            # spawn avoids forking a process that already runs server threads
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extraction_pool
+
+
+def _reset_extraction_pool():
+    global _extraction_pool, _extraction_pool_disabled
+    with _extraction_pool_lock:
+        if not _extraction_pool_worked and not _extraction_pool_disabled:
+            logger.warning(
+                "Extraction workers cannot start (is the main module missing an "
+                "`if __name__ == '__main__'` guard?); extracting in-thread"
+            )
+            _extraction_pool_disabled = True
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(wait=False, cancel_futures=True)
+        _extraction_pool = None
+
+
+def _page_ranges(page_count, parts):
+    size = -(-page_count // parts)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def _extract_in_pool(pool, path):
+    global _extraction_pool_worked
+    if not PDF_MAX_CHARS and path.lower().endswith(".pdf") and EXTRACTION_WORKERS > 1:
+        page_count = pdf_page_count(path)
+        if page_count >= PDF_PARALLEL_MIN_PAGES:
+            futures = [
+                pool.submit(extract_pdf_pages, path, start, stop)
+                for start, stop in _page_ranges(page_count, EXTRACTION_WORKERS)
+            ]
+            text = PAGE_BREAK.join(future.result() for future in futures)
+            _extraction_pool_worked = True
+            return text
+    text = pool.submit(extract_text, path).result()
+    _extraction_pool_worked = True
+    return text
+
+
+def _extract(path):
+    """Run extract_text in the process pool, in-thread if the pool is broken"""
+    pool = _get_extraction_pool()
+    if pool is None:
+        return extract_text(path)
+    try:
+        return _extract_in_pool(pool, path)
+    except BrokenProcessPool:
+        logger.warning(f"Extraction pool broken, recreating it (file: {path})")
+        _reset_extraction_pool()
+        return extract_text(path)
+    except RuntimeError as e:
+        # spawn refuses to start workers from a process that is itself
+        # still importing its main module
+        if "bootstrapping phase" not in str(e):
+            raise
+        _reset_extraction_pool()
+        return extract_text(path)
+
+
+# Cached text depends on the extraction caps and page separator as well as
+# the file's bytes
+_TEXT_CACHE_SUFFIX = f":pdf{PDF_MAX_CHARS}:docx{DOCX_MAX_CHARS}:pages"
+
+
+def _extract_with_cache(path, file_hash):
+    """Return (text, name), skipping parsing entirely for previously seen bytes"""
+    cache_key = file_hash + _TEXT_CACHE_SUFFIX if file_hash else None
+    cached = get_cached_text(cache_key)
+    if cached is not None:
+        logger.info(f"Text cache hit for {os.path.basename(path)}")
+        return cached
+
+    start_time = time.perf_counter()
+    text = _extract(path)
+    file_format = os.path.splitext(path)[1].lstrip(".").lower() or "unknown"
+    EXTRACTION_SECONDS.observe(time.perf_counter() - start_time, format=file_format)
+
+    # Extract name first using our specialized name extractor
+    extracted_name = extract_name_from_text(text) if text and text.strip() else None
+
+    if text and text.strip():
+        store_cached_text(cache_key, text, extracted_name)
+    return text, extracted_name
+
+
+def _candidate_fields(result, extracted_name):
+    # Use our extracted name if available, otherwise use LLM's attempt
+    final_name = extracted_name if extracted_name else result.get("name", "Unknown")
+
+    fields = {
+        "name": final_name,
+        "score": result.get("score", 50),
+        "classification": result.get("classification", "Partial"),
+        "summary": result.get("summary", "")
+    }
+    if "match_ratio" in result:
+        # Keywords never contain whitespace (they come from str.split)
+        fields["matched_keywords"] = " ".join(sorted(result.get("matched_keywords") or []))
+        fields["match_ratio"] = result["match_ratio"]
+    return fields
+
+
+def _reuse_duplicates(job_id, jd, backend, extracted, outcomes, fingerprints):
+    """
+    Take near-duplicates of already scored resumes out of `extracted`,
+    giving them the original's score, and fingerprint the rest.
+    """
+    scope = scoring_scope(jd, backend)
+    db = SessionLocal()
+    try:
+        for slot, (text, extracted_name) in list(extracted.items()):
+            signature = minhash_signature(text)
+            if signature is None:
+                continue
+            original = find_duplicate(db, scope, signature, job_id)
+            if original is None:
+                fingerprints[slot] = (scope, signature)
+                continue
+            del extracted[slot]
+            outcomes[slot] = {
+                "name": extracted_name or original.name,
+                "score": original.score,
+                "classification": original.classification,
+                "summary": original.summary,
+                "duplicate_of": original.id,
+                "matched_keywords": original.matched_keywords,
+                "match_ratio": original.match_ratio
+            }
+    finally:
+        db.close()
+
+
+def _analyze_batch(jd, batch, total, backend=None, job_id=None):
+    """
+    Extract, name and score a batch of (index, path, file_hash, local_score)
+    items. Items with a local_score (outside the pre-ranked top-K) skip the
+    LLM and keep that score; near-duplicates of scored resumes reuse theirs.
+
+    Returns (outcomes, fingerprints) with one entry per item. An outcome is
+    a dict of Candidate fields, or the exception that item raised, so one
+    bad file never fails its neighbours. A fingerprint is the (scope,
+    signature) to index once the item's Candidate is written, or None.
+    """
+    outcomes = [None] * len(batch)
+    fingerprints = [None] * len(batch)
+    extracted = {}
+    batch_start_time = time.time()
+
+    for slot, (index, path, file_hash, local_score) in enumerate(batch):
+        logger.info(f"Processing file {index}/{total}: {os.path.basename(path)}")
+        try:
+            with span("extract", file=os.path.basename(path), position=index):
+                text, extracted_name = _extract_with_cache(path, file_hash)
+        except Exception as e:
+            outcomes[slot] = e
+            continue
+
+        if not text or not text.strip():
+            logger.warning(f"No text extracted from {path}")
+            outcomes[slot] = {
+                "name": "Unknown",
+                "score": 0,
+                "classification": "Weak",
+                "summary": "No text extracted"
+            }
+        elif local_score is not None:
+            outcomes[slot] = {
+                "name": extracted_name or "Unknown",
+                "score": local_score,
+                "classification": classify_score(local_score),
+                "summary": "Local keyword ranking (outside the top candidates sent for AI review)",
+                "scored_locally": True
+            }
+        else:
+            extracted[slot] = (text, extracted_name)
+
+    if extracted and DEDUP_ENABLED:
+        try:
+            with span("dedup", files=len(extracted)):
+                _reuse_duplicates(job_id, jd, backend, extracted, outcomes, fingerprints)
+        except Exception as e:
+            logger.warning(f"Near-duplicate lookup failed, scoring normally: {e}")
+
+    if extracted:
+        slots = list(extracted)
+        names = ", ".join(os.path.basename(batch[slot][1]) for slot in slots)
+        start_time = time.time()
+        try:
+            with span("score", files=len(slots)):
+                if len(slots) == 1:
+                    results = [score_resume(jd, extracted[slots[0]][0], backend)]
+                else:
+                    results = score_resumes(jd, [extracted[slot][0] for slot in slots], backend)
+            for slot, result in zip(slots, results):
+                outcomes[slot] = _candidate_fields(result, extracted[slot][1])
+                if result.get("fallback"):
+                    # Keyword scores are not worth handing on to duplicates
+                    fingerprints[slot] = None
+        except Exception as e:
+            for slot in slots:
+                outcomes[slot] = e
+        logger.info(f"LLM scoring for {names}: {time.time() - start_time:.2f}s")
+
+    logger.info(
+        f"Files {batch[0][0]}-{batch[-1][0]} processed in {time.time() - batch_start_time:.2f}s"
+    )
+    return outcomes, fingerprints
+
+
+def _submit_outcome(task, outcome, fingerprint=None):
+    """Hand one task's Candidate fields to the buffered result writer"""
+    if isinstance(outcome, Exception):
+        logger.error(f"Error processing {task.file_path}: {outcome}")
+        logger.error("".join(traceback.format_exception(outcome)))
+        status = "failed"
+        # Create a candidate record for the failed file
+        fields = {
+            "name": "Processing Error",
+            "score": 0,
+            "classification": "Weak",
+            "summary": f"Failed to process file: {str(outcome)[:100]}"
+        }
+    else:
+        status = "done"
+        fields = outcome
+    result_writer.submit(task, status, fields, fingerprint if status == "done" else None)
+
+
+def process_tasks(tasks):
+    """
+    Process a claimed batch of tasks that all belong to one job, renewing
+    their leases so a slow LLM batch is not claimed and scored twice
+    """
+    job_id = tasks[0].job_id
+    with span("process_tasks", job_id=job_id, tasks=len(tasks)):
+        with keep_lease(lambda: renew_tasks(tasks)):
+            _process_tasks(job_id, tasks)
+
+
+def _process_tasks(job_id, tasks):
     db = SessionLocal()
     try:
         job = db.query(Job).filter(Job.id == job_id).first()
         if not job:
             logger.error(f"Job {job_id} not found")
             return
+        jd, total, backend = job.jd or "", job.total_files, job.scoring_backend
+    finally:
+        db.close()
+    # Memoized by JD, so every batch of a job shares one compiled JD
+    jd = compile_jd(jd)
 
-        successful_count = 0
-        failed_count = 0
+    # Tasks whose earlier attempts never finished (worker crash, OOM on
+    # a pathological file) are failed instead of retried forever.
+    runnable = [task for task in tasks if task.attempts <= TASK_MAX_ATTEMPTS]
+    exhausted = [task for task in tasks if task.attempts > TASK_MAX_ATTEMPTS]
 
-        for i, path in enumerate(file_paths, 1):
-            file_start_time = time.time()
-            try:
-                logger.info(f"Processing file {i}/{len(file_paths)}: {os.path.basename(path)}")
-                
-                text = extract_text(path)
-                
-                # Extract name first using our specialized name extractor
-                extracted_name = extract_name_from_text(text) if text and text.strip() else None
-                
-                if not text or not text.strip():
-                    logger.warning(f"No text extracted from {path}")
-                    candidate = Candidate(
-                        job_id=job_id,
-                        name="Unknown",
-                        score=0,
-                        classification="Weak",
-                        summary="No text extracted"
-                    )
-                else:
-                    start_time = time.time()
-                    result = score_resume(jd, text)
-                    llm_time = time.time() - start_time
-                    log_performance_metrics(f"LLM scoring for {os.path.basename(path)}", llm_time)
-                    
-                    # Use our extracted name if available, otherwise use LLM's attempt
-                    final_name = extracted_name if extracted_name else result.get("name", "Unknown")
-                    
-                    candidate = Candidate(
-                        job_id=job_id,
-                        name=final_name,
-                        score=result.get("score", 50),
-                        classification=result.get("classification", "Partial"),
-                        summary=result.get("summary", "")
-                    )
-                
-                db.add(candidate)
-                successful_count += 1
-                logger.info(f"Successfully processed: {os.path.basename(path)}")
+    if runnable:
+        batch = [
+            (task.position, task.file_path, task.file_hash, task.local_score)
+            for task in runnable
+        ]
+        try:
+            outcomes, fingerprints = _analyze_batch(jd, batch, total, backend, job_id)
+        except Exception as e:
+            outcomes, fingerprints = [e] * len(runnable), [None] * len(runnable)
+        for task, outcome, fingerprint in zip(runnable, outcomes, fingerprints):
+            _submit_outcome(task, outcome, fingerprint)
 
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Error processing {path}: {e}")
-                logger.error(traceback.format_exc())
-                
-                # Create a candidate record for the failed file
-                try:
-                    candidate = Candidate(
-                        job_id=job_id,
-                        name="Processing Error",
-                        score=0,
-                        classification="Weak",
-                        summary=f"Failed to process file: {str(e)[:100]}"
-                    )
-                    db.add(candidate)
-                except Exception as commit_error:
-                    logger.error(f"Failed to add error record: {commit_error}")
-                    db.rollback()
-
-            # Update progress after each file
-            setattr(job, 'processed_files', i)  # Use setattr to avoid type issues
-            db.commit()
-            
-            # Log file processing time
-            file_time = time.time() - file_start_time
-            log_performance_metrics(f"File {i} processing", file_time)
-
-        # Final status update
-        if failed_count == 0:
-            setattr(job, 'status', "completed")
-            logger.info(f"Job {job_id} completed successfully. Processed {successful_count} files.")
-        elif successful_count > 0:
-            setattr(job, 'status', "completed_with_errors")
-            logger.info(f"Job {job_id} completed with {successful_count} successful and {failed_count} failed files.")
-        else:
-            setattr(job, 'status', "failed")
-            logger.error(f"Job {job_id} failed. All {failed_count} files failed to process.")
-        
+    for task in exhausted:
+        _submit_outcome(task, RuntimeError(
+            f"Gave up after {task.attempts - 1} interrupted attempts"
+        ))
+
+
+def rank_job(job_id, owner):
+    """
+    Pre-rank all files of a job locally and mark everything outside the top
+    prerank_top_k with its local score. Extraction results land in the text
+    cache, so the file tasks that follow do not parse the files again. The
+    pre-ranking lease held as `owner` is renewed while files are extracted.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        tasks = db.query(JobTask).filter(JobTask.job_id == job_id).order_by(JobTask.position).all()
+        jd, top_k = job.jd or "", job.prerank_top_k
+        task_ids = [task.id for task in tasks]
+        files = [(task.file_path, task.file_hash) for task in tasks]
+    finally:
+        db.close()
+
+    def extract_or_empty(item):
+        try:
+            return _extract_with_cache(*item)[0] or ""
+        except Exception as e:
+            # The file task will hit the same error and record it
+            logger.warning(f"Pre-ranking could not read {item[0]}: {e}")
+            return ""
+
+    start_time = time.time()
+    with span("rank_job", job_id=job_id, files=len(files)):
+        with keep_lease(lambda: renew_ranking(job_id, owner)):
+            with ThreadPoolExecutor(max_workers=max(1, EXTRACTION_WORKERS)) as pool:
+                texts = list(pool.map(extract_or_empty, files))
+
+            selected = select_top_k(jd, texts, top_k)
+        local_scores = {
+            task_id: local_score
+            for task_id, local_score in zip(task_ids, selected)
+            if local_score is not None
+        }
+        if not complete_ranking(job_id, owner, local_scores):
+            return
+    logger.info(f"Pre-ranking of job {job_id} ({len(texts)} files) took {time.time() - start_time:.2f}s")
+    logger.info(f"Job {job_id}: {len(texts) - len(local_scores)} files go to the LLM, {len(local_scores)} scored locally")
+
+
+def work_once(worker_id, job_id=None):
+    """Claim and process one unit of work. Returns how many items were handled."""
+    ranking = claim_ranking(worker_id, job_id)
+    if ranking is not None:
+        try:
+            rank_job(*ranking)
+        except Exception:
+            release_ranking(*ranking)
+            raise
+        return 1
+
+    tasks = claim_tasks(worker_id, max(1, LLM_BATCH_SIZE), job_id)
+    if tasks:
+        process_tasks(tasks)
+    return len(tasks)
+
+
+def prerank_top_k_for(total_files, top_k=None):
+    """The pre-ranking cut-off to store on a job, or None when not needed"""
+    top_k = PRERANK_TOP_K if top_k is None else top_k
+    if top_k <= 0 or total_files <= top_k:
+        return None
+    return top_k
+
+
+@timing_decorator
+def process_job(job_id, jd, file_paths, file_hashes=None, top_k=None, backend=None):
+    """
+    Enqueue a job's files and drain them in this process with
+    SCORING_CONCURRENCY threads. The API only enqueues and leaves the work
+    to queue workers; this is the synchronous path for scripts.
+
+    Extraction workers are spawned and re-import the calling script, so call
+    this under `if __name__ == "__main__":`. Without the guard, extraction
+    falls back to running in-thread.
+    """
+    if getattr(sys.modules.get("__mp_main__"), "__name__", None) == "__mp_main__":
+        # This is an extraction worker re-running an unguarded script; the
+        # parent process owns the job
+        raise RuntimeError(
+            "process_job called while an extraction worker was in its bootstrapping phase; "
+            "guard the calling script with `if __name__ == '__main__':`"
+        )
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            logger.error(f"Job {job_id} not found")
+            return
+        setattr(job, 'jd', jd)
+        setattr(job, 'prerank_top_k', prerank_top_k_for(len(file_paths), top_k))
+        setattr(job, 'scoring_backend', backend)
+        enqueue_tasks(db, job_id, file_paths, file_hashes)
         db.commit()
-        
-        # Clean up uploaded files
-        cleanup_uploaded_files(file_paths)
-        
-    except Exception as e:
-        logger.error(f"Fatal error in process_job {job_id}: {e}")
-        logger.error(traceback.format_exc())
-        if job:
-            setattr(job, 'status', "failed")
-            db.commit()
     finally:
         db.close()
 
+    worker_id = f"inline-{os.getpid()}"
 
-def cleanup_uploaded_files(file_paths):
-    """Clean up uploaded files after processing"""
-    for path in file_paths:
+    def drain():
+        # Keep going while any task is unfinished: another thread may hold
+        # the pre-ranking lease, during which no file task is claimable.
+        while True:
+            if work_once(worker_id, job_id):
+                continue
+            db = SessionLocal()
+            try:
+                if not unfinished_count(db, job_id):
+                    return
+            finally:
+                db.close()
+            time.sleep(0.2)
+
+    with span("process_job", job_id=job_id, files=len(file_paths)):
+        with ThreadPoolExecutor(max_workers=max(1, SCORING_CONCURRENCY)) as pool:
+            futures = [pool.submit(drain) for _ in range(max(1, SCORING_CONCURRENCY))]
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Job {job_id} drain thread failed: {e}")
+                logger.error("".join(traceback.format_exception(e)))
+                errors.append(e)
+    result_writer.flush()
+
+    if errors:
+        # Fine if the other threads finished the job; otherwise the caller must know
+        db = SessionLocal()
         try:
-            if os.path.exists(path):
-                os.remove(path)
-                logger.info(f"Cleaned up file: {path}")
-        except Exception as e:
-            logger.error(f"Failed to cleanup file {path}: {e}")
+            unfinished = unfinished_count(db, job_id)
+        finally:
+            db.close()
+        if unfinished:
+            raise errors[0]
@@ -0,0 +1,292 @@
+"""
+Async LLM HTTP client for the Ollama chat API.
+
+One pooled keep-alive httpx.AsyncClient runs on a dedicated event loop
+thread, so the synchronous worker threads share connections through
+chat(), while async code can await achat(). Every request goes through a
+token-bucket rate limiter, retries transient failures with jittered
+exponential backoff, and is guarded by a per-host circuit breaker.
+While the breaker is open, calls fail immediately and scoring falls back
+to keyword matching instead of waiting for a timeout on every file.
+Clients (and httpx itself) are only loaded when the first call is made.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from .metrics import LLM_RETRIES
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.environ.get("LLM_READ_TIMEOUT", "120"))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "16"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX", "10"))
+# Requests per second and burst size; LLM_RATE_LIMIT=0 disables limiting
+LLM_RATE_LIMIT = float(os.environ.get("LLM_RATE_LIMIT", "5"))
+LLM_RATE_BURST = int(os.environ.get("LLM_RATE_BURST", "10"))
+LLM_BREAKER_THRESHOLD = int(os.environ.get("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the backend while the circuit breaker is open"""
+
+
+class RetryableStatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"LLM backend returned HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket; Retry-After from the server pauses it entirely"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def block_for(self, seconds):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive calls that found the backend down:
+    transport errors, 5xx/429 responses, or retries that ran out. Calls the
+    backend answered but rejected (other 4xx, bad JSON) are not counted.
+    After `cooldown` seconds a single probe call is let through; its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("LLM backend recovered, closing circuit breaker")
+            self.failures = 0
+            self.opened_at = None
+            self.probe_in_flight = False
+
+    def record_answered(self):
+        """The backend responded but the call still failed; neither count nor reset"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.warning(
+                        f"LLM backend failed {self.failures} times in a row, "
+                        f"using fallback scoring for {self.cooldown:.0f}s"
+                    )
+                self.opened_at = time.monotonic()
+
+
+def _retry_after(response):
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class AsyncLLMClient:
+    def __init__(self, host, api_key=None):
+        import httpx
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.host = host
+        self._http = httpx.AsyncClient(
+            base_url=host,
+            headers=headers,
+            timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT, pool=None),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS
+            )
+        )
+        self.bucket = TokenBucket(LLM_RATE_LIMIT, LLM_RATE_BURST)
+        self.breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN)
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(retry_after, LLM_BACKOFF_MAX)
+        # Full jitter: spreads retries from many workers over the window
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+    async def chat(self, model, messages, **options):
+        """POST /api/chat and return the decoded response ({"message": {...}, ...})"""
+        import httpx
+
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"LLM circuit open for {self.host}")
+
+        payload = {"model": model, "messages": messages, "stream": False, **options}
+        last_error = None
+
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            retry_after = None
+            try:
+                response = await self._http.post("/api/chat", json=payload)
+                if response.status_code in RETRYABLE_STATUS:
+                    retry_after = _retry_after(response)
+                    if retry_after:
+                        self.bucket.block_for(retry_after)
+                    raise RetryableStatusError(response.status_code, retry_after)
+                response.raise_for_status()
+                result = response.json()
+                self.breaker.record_success()
+                return result
+            except (httpx.TransportError, RetryableStatusError) as e:
+                last_error = e
+                if attempt < LLM_MAX_RETRIES:
+                    LLM_RETRIES.inc(host=self.host)
+                    delay = self._backoff(attempt, retry_after)
+                    logger.warning(f"LLM request failed ({e}), retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+            except httpx.HTTPStatusError as e:
+                # Non-retryable 5xx means the backend is broken; a 4xx means
+                # it answered and this request was bad
+                if e.response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_answered()
+                raise
+            except Exception:
+                # A malformed body is not an outage
+                self.breaker.record_answered()
+                raise
+
+        self.breaker.record_failure()
+        raise last_error
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+# -----------------------------
+# SHARED CLIENT AND SYNC BRIDGE
+# -----------------------------
+_loop = None
+_clients = {}
+_lock = threading.Lock()
+
+DEFAULT_HOST = os.environ.get("OLLAMA_HOST", "https://ollama.com")
+
+
+def _get_loop():
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-client-loop", daemon=True).start()
+        return _loop
+
+
+def get_client(host=None, api_key=None):
+    """
+    The shared client for a host, created on first use inside the client
+    loop. Each host gets its own connection pool, rate limiter and breaker.
+    """
+    host = host or DEFAULT_HOST
+    if api_key is None and host == DEFAULT_HOST:
+        api_key = os.environ.get("OLLAMA_API_KEY", "")
+    loop = _get_loop()
+    with _lock:
+        client = _clients.get(host)
+        if client is None:
+            async def create():
+                return AsyncLLMClient(host, api_key)
+            client = _clients[host] = asyncio.run_coroutine_threadsafe(create(), loop).result()
+        return client
+
+
+async def achat(model, messages, host=None, api_key=None, **options):
+    """Await a chat call from any event loop"""
+    client = get_client(host, api_key)
+    future = asyncio.run_coroutine_threadsafe(client.chat(model, messages, **options), _get_loop())
+    return await asyncio.wrap_future(future)
+
+
+def chat(model, messages, host=None, api_key=None, **options):
+    """Blocking chat call for worker threads; shares the pooled client"""
+    client = get_client(host, api_key)
+    return asyncio.run_coroutine_threadsafe(
+        client.chat(model, messages, **options), _get_loop()
+    ).result()
+
+
+def status():
+    """Circuit breaker state per backend host, for health checks"""
+    with _lock:
+        clients = dict(_clients)
+    return {
+        host: {
+            "circuit": client.breaker.state,
+            "consecutive_failures": client.breaker.failures
+        }
+        for host, client in clients.items()
+    }
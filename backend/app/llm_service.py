@@ -1,9 +1,19 @@
 import os
 import json
 import logging
+import re
+import textwrap
+import time
 import traceback
+from collections import Counter
+from functools import lru_cache
 from dotenv import load_dotenv
-from ollama import Client
+
+from .llm_client import CircuitOpenError
+from .metrics import SCORING_FALLBACKS
+from .scoring_backends import get_backend
+from .resume_parser import extract_header_name
+from .cache import score_cache_key, get_cached_score, store_cached_score
 
 # Load environment variables
 load_dotenv()
@@ -12,70 +22,196 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Ollama client
-client = Client(
-    host="https://ollama.com",
-    headers={"Authorization": "Bearer " + os.environ.get("OLLAMA_API_KEY", "")}
-)
-
-MODEL = "gpt-oss:120b"  # Change if needed
+# Bump whenever the prompt or result post-processing changes, so cached
+# results from the old prompt are no longer served.
+PROMPT_VERSION = "2"
 
 
 # -----------------------------
-# FALLBACK SCORING (Keyword Based)
+# PROMPT BUILDING
 # -----------------------------
-def fallback_score_resume(jd, resume_text):
-    import re
+# Token budgets for the JD and for each resume in a prompt (about 1500 and
+# 3000 characters of compacted text).
+JD_TOKEN_BUDGET = int(os.environ.get("LLM_JD_TOKEN_BUDGET", "375"))
+RESUME_TOKEN_BUDGET = int(os.environ.get("LLM_RESUME_TOKEN_BUDGET", "750"))
+# Leading resume lines (name, contact, headline) always kept when packing
+RESUME_HEADER_LINES = 5
+# Longer lines (PDFs extracted without line breaks) are packed in pieces
+PACK_LINE_CHARS = 300
+
+# A repeated line is dropped (after its first occurrence) when it sits in
+# the first or last PAGE_EDGE_LINES lines of a page, where running headers
+# and footers live, or when it occurs REPEATED_LINE_MIN times or more.
+# Section labels and bullets repeated under a few jobs are kept.
+PAGE_EDGE_LINES = 2
+REPEATED_LINE_MIN = 5
+
+_SPACE_RE = re.compile(r"[^\S\n]+")
+_BOILERPLATE_RE = re.compile(
+    r"(?:(?:page )?\d+ of \d+|page \d+|references (?:are )?available (?:up)?on request\.?"
+    r"|resume|cv|curriculum vitae)",
+    re.IGNORECASE
+)
+
+
+def _estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting English text
+    return len(text) // 4 + 1
 
-    lines = resume_text.split("\n")[:5]
-    name = "Unknown"
 
-    name_patterns = [
-        r'^[A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)?',
-        r'^[A-Z]\. [A-Z][a-z]+',
-        r'^[A-Z][a-z]+, [A-Z]\.',
-        r'^[A-Z][a-z]+ [A-Z]\. [A-Z][a-z]+',
+def compact_lines(text):
+    """
+    Lines with runs of whitespace collapsed, minus blank and boilerplate
+    lines and repeated page headers and footers
+    """
+    pages = [
+        [line for line in (_SPACE_RE.sub(" ", line).strip() for line in page.splitlines()) if line]
+        for page in text.split("\f")
     ]
+    counts = Counter(line for page in pages for line in page)
+    multi_page = len(pages) > 1
+
+    lines = []
+    seen = set()
+    for page in pages:
+        for index, line in enumerate(page):
+            if _BOILERPLATE_RE.fullmatch(line):
+                continue
+            if line in seen:
+                at_edge = index < PAGE_EDGE_LINES or index >= len(page) - PAGE_EDGE_LINES
+                if (multi_page and at_edge) or counts[line] >= REPEATED_LINE_MIN:
+                    continue
+            seen.add(line)
+            lines.append(line)
+    return lines
+
+
+def _truncate_to_budget(text, budget):
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[:cut if cut > 0 else limit]
+
+
+def pack_resume(jd, resume_text, budget=None):
+    """
+    The compacted resume, cut to `budget` tokens (RESUME_TOKEN_BUDGET).
+    When it does not fit, the header lines are kept and the rest of the
+    budget goes to the lines with the most JD keywords, in resume order.
+    """
+    budget = RESUME_TOKEN_BUDGET if budget is None else budget
+    lines = compact_lines(resume_text)
+    text = "\n".join(lines)
+    if _estimate_tokens(text) <= budget:
+        return text
 
+    pieces = []
     for line in lines:
-        line = line.strip()
-        if not line or len(line) > 60:
-            continue
+        pieces.extend(textwrap.wrap(line, PACK_LINE_CHARS) if len(line) > PACK_LINE_CHARS else [line])
 
-        skip_phrases = [
-            "email", "phone", "address", "objective",
-            "summary", "experience", "education",
-            "skills", "resume", "cv"
-        ]
+    def keyword_hits(index):
+        return sum(word in jd.keywords for word in pieces[index].lower().split())
+
+    header = min(RESUME_HEADER_LINES, len(pieces))
+    # Stable sort, so equally relevant lines keep resume order
+    order = list(range(header)) + sorted(range(header, len(pieces)), key=keyword_hits, reverse=True)
+    remaining = budget * 4
+    kept = []
+    for index in order:
+        cost = len(pieces[index]) + 1
+        if cost <= remaining:
+            kept.append(index)
+            remaining -= cost
+    return "\n".join(pieces[index] for index in sorted(kept))
 
-        if any(phrase in line.lower() for phrase in skip_phrases):
-            continue
 
-        for pattern in name_patterns:
-            match = re.match(pattern, line)
-            if match:
-                name = match.group(0).title()
-                break
+# -----------------------------
+# COMPILED JOB DESCRIPTIONS
+# -----------------------------
+# Distinct JDs whose compiled form is kept across jobs
+JD_CACHE_SIZE = int(os.environ.get("JD_CACHE_SIZE", "64"))
 
-        if name != "Unknown":
-            break
+COMMON_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on",
+    "at", "to", "for", "of", "with", "by", "is",
+    "are", "was", "were", "be", "been", "have",
+    "has", "had"
+})
 
-    jd_words = set(jd.lower().split())
-    resume_words = set(resume_text.lower().split())
+SINGLE_PROMPT_PREFIX = """
+Evaluate the resume against the job description.
 
-    common_words = {
-        "the", "a", "an", "and", "or", "but", "in", "on",
-        "at", "to", "for", "of", "with", "by", "is",
-        "are", "was", "were", "be", "been", "have",
-        "has", "had"
-    }
+Return JSON only in this exact format:
+{{"name": "Name", "score": 0-100, "classification": "Excellent/Strong/Partial/Weak", "summary": "Brief summary"}}
+
+JOB DESCRIPTION:
+{jd}
+
+RESUME:
+"""
+
+BATCH_PROMPT_PREFIX = """
+Evaluate each resume against the job description.
+
+Return a JSON array only, with one object per resume, in this exact format:
+[{{"index": 0, "name": "Name", "score": 0-100, "classification": "Excellent/Strong/Partial/Weak", "summary": "Brief summary"}}]
+
+JOB DESCRIPTION:
+{jd}
+
+"""
+
+
+class CompiledJD:
+    """
+    The resume-independent half of scoring: the compacted, budgeted JD, its
+    keyword set and the prompt text that precedes the resume. A job's JD is
+    constant, so this is built once instead of once per resume, and every
+    prompt of a job starts with the same prefix, which Ollama can reuse
+    from its cache while the model stays loaded (LLM_KEEP_ALIVE).
+    """
+
+    def __init__(self, jd):
+        self.valid = bool(jd.strip())
+        self.text = _truncate_to_budget("\n".join(compact_lines(jd)), JD_TOKEN_BUDGET)
+        self.keywords = frozenset(self.text.lower().split()) - COMMON_WORDS
+        self.keyword_sample = list(self.keywords)[:10]
+        self.tokens = _estimate_tokens(self.text)
+        self.single_prompt_prefix = SINGLE_PROMPT_PREFIX.format(jd=self.text)
+        self.batch_prompt_prefix = BATCH_PROMPT_PREFIX.format(jd=self.text)
+
+    def keyword_matches(self, resume_text):
+        return self.keywords.intersection(resume_text.lower().split())
 
-    jd_keywords = jd_words - common_words
-    matches = resume_words.intersection(jd_keywords)
+    def match_ratio(self, matches):
+        return len(matches) / len(self.keywords) if self.keywords else 0
 
-    if len(jd_keywords) > 0:
-        match_ratio = len(matches) / len(jd_keywords)
-        score = min(85, int(match_ratio * 100))
+    def __repr__(self):
+        return f"<CompiledJD(chars={len(self.text)}, keywords={len(self.keywords)})>"
+
+
+@lru_cache(maxsize=JD_CACHE_SIZE)
+def _compile_jd(jd):
+    return CompiledJD(jd)
+
+
+def compile_jd(jd):
+    """The CompiledJD for a JD string, memoized across jobs; compiled JDs pass through"""
+    return jd if isinstance(jd, CompiledJD) else _compile_jd(jd)
+
+
+# -----------------------------
+# FALLBACK SCORING (Keyword Based)
+# -----------------------------
+def fallback_score_resume(jd, resume_text):
+    jd = compile_jd(jd)
+    name = extract_header_name(resume_text) or "Unknown"
+
+    matches = jd.keyword_matches(resume_text)
+
+    if jd.keywords:
+        score = min(85, int(jd.match_ratio(matches) * 100))
     else:
         score = 50
 
@@ -92,17 +228,44 @@ def fallback_score_resume(jd, resume_text):
         "classification": classification,
         "summary": f"Fallback analysis: {len(matches)} keyword matches",
         "matched_keywords": list(matches)[:10],
-        "jd_keywords": list(jd_keywords)[:10],
-        "match_ratio": len(matches) / len(jd_keywords) if len(jd_keywords) else 0
+        "jd_keywords": jd.keyword_sample,
+        "match_ratio": jd.match_ratio(matches),
+        "fallback": True
     }
 
 
+# -----------------------------
+# RESULT POST-PROCESSING
+# -----------------------------
+def _validate_result(result):
+    result["name"] = result.get("name", "Unknown")
+    result["score"] = max(0, min(100, float(result.get("score", 50))))
+    result["classification"] = result.get(
+        "classification", "Partial"
+    )
+    result["summary"] = result.get(
+        "summary", "No summary available"
+    )
+    return result
+
+
+def _add_keyword_info(result, jd, resume_text):
+    matches = jd.keyword_matches(resume_text)
+
+    result["matched_keywords"] = list(matches)[:10]
+    result["jd_keywords"] = jd.keyword_sample
+    result["match_ratio"] = jd.match_ratio(matches)
+    return result
+
+
 # -----------------------------
 # MAIN LLM SCORING FUNCTION
 # -----------------------------
-def score_resume(jd, resume_text):
+def score_resume(jd, resume_text, backend=None):
+    """Score one resume; jd is a JD string or a CompiledJD"""
+    jd = compile_jd(jd)
 
-    if not jd.strip():
+    if not jd.valid:
         return {
             "name": "Unknown",
             "score": 0,
@@ -110,7 +273,8 @@ def score_resume(jd, resume_text):
             "summary": "Invalid job description"
         }
 
-    if not resume_text.strip():
+    resume_text = pack_resume(jd, resume_text)
+    if not resume_text:
         return {
             "name": "Unknown",
             "score": 0,
@@ -118,77 +282,165 @@ def score_resume(jd, resume_text):
             "summary": "Invalid resume text"
         }
 
-    # Truncate to avoid token overflow
-    jd = jd[:1500]
-    resume_text = resume_text[:3000]
+    backend = get_backend(backend)
+    if not backend.is_llm:
+        return fallback_score_resume(jd, resume_text)
 
-    prompt = f"""
-Evaluate the resume against the job description.
+    cache_key = score_cache_key(jd.text, resume_text, backend.cache_id, PROMPT_VERSION)
+    cached = get_cached_score(cache_key)
+    if cached is not None:
+        return cached
 
-Return JSON only in this exact format:
-{{"name": "Name", "score": 0-100, "classification": "Excellent/Strong/Partial/Weak", "summary": "Brief summary"}}
+    return _score_single(jd, resume_text, cache_key, backend)
 
-JOB DESCRIPTION:
-{jd}
 
-RESUME:
-{resume_text}
-"""
+def _score_single(jd, resume_text, cache_key, backend):
+    """One LLM round trip for already truncated, cache-missed input"""
+    prompt = jd.single_prompt_prefix + resume_text + "\n"
 
     try:
-        response = client.chat(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        start_time = time.time()
+        response = backend.chat([{"role": "user", "content": prompt}])
 
         output = response["message"]["content"]
+        llm_time = time.time() - start_time
 
         # Extract JSON safely
         start = output.find("{")
         end = output.rfind("}") + 1
         json_str = output[start:end]
 
-        result = json.loads(json_str)
-
-        # Validate response
-        result["name"] = result.get("name", "Unknown")
-        result["score"] = max(0, min(100, float(result.get("score", 50))))
-        result["classification"] = result.get(
-            "classification", "Partial"
-        )
-        result["summary"] = result.get(
-            "summary", "No summary available"
-        )
-
-        # Add keyword matching info
-        jd_words = set(jd.lower().split())
-        resume_words = set(resume_text.lower().split())
-
-        common_words = {
-            "the", "a", "an", "and", "or", "but", "in", "on",
-            "at", "to", "for", "of", "with", "by", "is",
-            "are", "was", "were", "be", "been", "have",
-            "has", "had"
-        }
-
-        jd_keywords = jd_words - common_words
-        matches = resume_words.intersection(jd_keywords)
-
-        result["matched_keywords"] = list(matches)[:10]
-        result["jd_keywords"] = list(jd_keywords)[:10]
-        result["match_ratio"] = (
-            len(matches) / len(jd_keywords)
-            if len(jd_keywords) > 0 else 0
-        )
+        result = _validate_result(json.loads(json_str))
+        result = _add_keyword_info(result, jd, resume_text)
 
+        store_cached_score(cache_key, result, llm_time)
         return result
 
+    except CircuitOpenError:
+        # Backend known to be down: no log spam, no waiting on a timeout
+        SCORING_FALLBACKS.inc(reason="circuit_open")
+        return fallback_score_resume(jd, resume_text)
+
     except Exception as e:
         logger.error(f"LLM Error: {e}")
         logger.error(traceback.format_exc())
+        SCORING_FALLBACKS.inc(reason="llm_error")
         return fallback_score_resume(jd, resume_text)
 
 
+# -----------------------------
+# BATCHED LLM SCORING
+# -----------------------------
+# Prompt tokens allowed per batched call; the JD is sent once per batch
+# instead of once per resume.
+BATCH_TOKEN_BUDGET = int(os.environ.get("LLM_BATCH_TOKEN_BUDGET", "6000"))
+BATCH_MAX_RESUMES = int(os.environ.get("LLM_BATCH_MAX_RESUMES", "8"))
+
+
+def _pack_batches(jd, pending):
+    """Group (index, text, key) items so each batch fits the token budget"""
+    base_tokens = jd.tokens + 100
+    batches = []
+    current = []
+    used = base_tokens
+
+    for item in pending:
+        cost = _estimate_tokens(item[1]) + 10
+        if current and (used + cost > BATCH_TOKEN_BUDGET or len(current) >= BATCH_MAX_RESUMES):
+            batches.append(current)
+            current = []
+            used = base_tokens
+        current.append(item)
+        used += cost
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _score_batch(jd, batch, backend):
+    """Score a packed batch in one call. Returns {index: result} for valid entries."""
+    resumes = "\n".join(
+        f"RESUME {slot}:\n{text}\n" for slot, (_, text, _) in enumerate(batch)
+    )
+    prompt = jd.batch_prompt_prefix + resumes + "\n"
+
+    start_time = time.time()
+    response = backend.chat([{"role": "user", "content": prompt}])
+
+    output = response["message"]["content"]
+    llm_time = time.time() - start_time
+
+    start = output.find("[")
+    end = output.rfind("]") + 1
+    entries = json.loads(output[start:end])
+
+    results = {}
+    for entry in entries:
+        try:
+            slot = int(entry["index"])
+            if not 0 <= slot < len(batch) or "score" not in entry:
+                continue
+            index, text, cache_key = batch[slot]
+            result = _validate_result(
+                {k: entry[k] for k in ("name", "score", "classification", "summary") if k in entry}
+            )
+            result = _add_keyword_info(result, jd, text)
+            store_cached_score(cache_key, result, llm_time / len(batch))
+            results[index] = result
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping malformed batch entry {entry!r}: {e}")
+
+    return results
+
+
+def score_resumes(jd, resume_texts, backend=None):
+    """
+    Score several resumes against one JD, packing them into as few LLM
+    calls as the token budget allows. Results are returned in input order;
+    any resume missing from a batch reply is scored on its own.
+    """
+    jd = compile_jd(jd)
+    backend = get_backend(backend)
+    if not jd.valid or not backend.is_llm:
+        return [score_resume(jd, text, backend.name) for text in resume_texts]
+
+    results = [None] * len(resume_texts)
+    pending = []
+
+    for index, resume_text in enumerate(resume_texts):
+        packed = pack_resume(jd, resume_text)
+        if not packed:
+            results[index] = score_resume(jd, resume_text, backend.name)
+            continue
+
+        resume_text = packed
+        cache_key = score_cache_key(jd.text, resume_text, backend.cache_id, PROMPT_VERSION)
+        cached = get_cached_score(cache_key)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending.append((index, resume_text, cache_key))
+
+    for batch in _pack_batches(jd, pending):
+        scored = {}
+        if len(batch) > 1:
+            try:
+                scored = _score_batch(jd, batch, backend)
+            except Exception as e:
+                logger.error(f"Batch LLM Error ({len(batch)} resumes): {e}")
+
+            if len(scored) < len(batch):
+                logger.warning(
+                    f"Batch reply covered {len(scored)}/{len(batch)} resumes, scoring the rest individually"
+                )
+
+        for index, resume_text, cache_key in batch:
+            results[index] = scored.get(index) or _score_single(jd, resume_text, cache_key, backend)
+
+    return results
+
+
 # -----------------------------
 # TEST RUN
 # -----------------------------
@@ -1,19 +1,77 @@
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Form, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import shutil, os
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
 import time
 import logging
 import traceback
+import zipfile
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from .database import Base, engine, SessionLocal
+from .database import SessionLocal, migrate
 from .models import Job, Candidate
-from .job_service import process_job
+from .task_queue import enqueue_tasks
+from .events import broker, candidate_payload
+from .worker import start_workers
+from .result_writer import result_writer
+from .job_service import prerank_top_k_for
+from .cache import cache_stats
+from . import metrics
+from . import llm_client
+from .scoring_backends import get_backend
+from .ingest import (
+    BULK_MAX_ARCHIVE_BYTES, create_bulk_job, recover_ingests, resolve_import_directory, start_ingest
+)
+from .upload_service import (
+    ALLOWED_EXTENSIONS, UPLOAD_DIR, MAX_UPLOAD_REQUEST_BYTES,
+    UploadSizeLimitMiddleware, stage_upload, commit_upload, discard_staged
+)
+
+EMBEDDED_WORKER = os.environ.get("EMBEDDED_WORKER", "1") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Schema setup runs at startup rather than at import, so importing the
+    # app (tooling, tests, worker processes) stays cheap.
+    logger.info("Creating database tables...")
+    start_time = time.time()
+    await run_in_threadpool(migrate)
+    logger.info(f"Database setup completed in {time.time() - start_time:.2f}s")
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # Bulk ingests cut short by a restart resume (or are finished) here
+    await run_in_threadpool(recover_ingests)
+
+    # Single-process deployments run the queue worker inside the API;
+    # set EMBEDDED_WORKER=0 and run `python -m app.worker` to split them.
+    stop_event = threading.Event()
+    if EMBEDDED_WORKER:
+        start_workers(stop_event, name="embedded")
+    yield
+    stop_event.set()
+    result_writer.flush()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Runs before the multipart body is parsed, so oversized requests are
+# refused without spooling them to disk first.
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    "/start-job": MAX_UPLOAD_REQUEST_BYTES,
+    "/bulk-job": BULK_MAX_ARCHIVE_BYTES,
+})
 
-app = FastAPI()
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,13 +79,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-logger.info("Creating database tables...")
-start_time = time.time()
-Base.metadata.create_all(bind=engine)
-logger.info(f"Database setup completed in {time.time() - start_time:.2f}s")
-
 # # Test Ollama connection
 # from .llm_service import test_ollama_connection
 # try:
@@ -38,21 +92,31 @@ logger.info(f"Database setup completed in {time.time() - start_time:.2f}s")
 # except Exception as e:
 #     logger.error(f"Failed to test Ollama connection: {e}")
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 
 @app.get("/")
 def home():
     logger.info("Health check endpoint accessed")
-    return {"message": "HR Resume Analyzer API", "status": "running"}
+    return {"message": "HR Resume Analyzer API", "status": "running", "llm": llm_client.status()}
+
+
+@app.get("/cache-stats")
+def get_cache_stats():
+    """Hit/miss counters and estimated LLM seconds saved per cache"""
+    return cache_stats()
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/start-job")
 async def start_job(
-    background_tasks: BackgroundTasks,
     jd: str = Form(...),
-    files: list[UploadFile] = File(...)
+    files: list[UploadFile] = File(...),
+    top_k: int | None = Form(None),
+    backend: str | None = Form(None)
 ):
     if not jd or not jd.strip():
         raise HTTPException(status_code=400, detail="Job description cannot be empty")
@@ -63,8 +127,14 @@ async def start_job(
     if len(files) > 20:
         raise HTTPException(status_code=400, detail="Maximum 20 files allowed per job")
     
+    if backend:
+        try:
+            get_backend(backend)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     # Validate file types
-    allowed_extensions = {'.pdf', '.docx', '.doc'}
+    allowed_extensions = ALLOWED_EXTENSIONS
     for file in files:
         if not file.filename:
             raise HTTPException(status_code=400, detail="All files must have names")
@@ -76,11 +146,46 @@ async def start_job(
                 detail=f"File {file.filename} has unsupported format. Allowed: {', '.join(allowed_extensions)}"
             )
     
+    # Read uploads (into memory, or staging for large files) before creating
+    # the job, so a rejected upload never leaves a job stuck in "processing".
+    # The job is created off the event loop: it writes every upload to disk.
+    staged = []
+    try:
+        remaining = MAX_UPLOAD_REQUEST_BYTES
+        for file in files:
+            upload, file_hash, size = await stage_upload(file, remaining)
+            staged.append((upload, file_hash, file.filename))
+            remaining -= size
+    except HTTPException:
+        discard_staged([upload for upload, _, _ in staged])
+        raise
+    except Exception as e:
+        logger.error(f"Failed to save file {file.filename}: {e}")
+        discard_staged([upload for upload, _, _ in staged])
+        raise HTTPException(status_code=500, detail=f"Failed to save file {file.filename}")
+
+    try:
+        job_id = await run_in_threadpool(_create_job, staged, jd, top_k, backend)
+    except Exception as e:
+        logger.error(f"Unexpected error in start_job: {e}")
+        logger.error(traceback.format_exc())
+        discard_staged([upload for upload, _, _ in staged])
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    return {
+        "job_id": job_id,
+        "message": "Processing started",
+        "total_files": len(files)
+    }
+
+
+def _create_job(staged, jd, top_k, backend):
+    """Write the uploads and commit the job with its tasks (blocking). Returns the job id."""
     db = SessionLocal()
     try:
         job = Job(
             status="processing",
-            total_files=len(files),
+            total_files=len(staged),
             processed_files=0
         )
         db.add(job)
@@ -88,47 +193,121 @@ async def start_job(
         db.refresh(job)
 
         file_paths = []
+        file_hashes = []
 
-        for file in files:
-            try:
-                path = f"{UPLOAD_DIR}/{job.id}_{int(time.time())}_{file.filename}"
-                with open(path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-                file_paths.append(path)
-                logger.info(f"Saved file: {file.filename} -> {path}")
-            except Exception as e:
-                logger.error(f"Failed to save file {file.filename}: {e}")
-                # Clean up any files already saved
-                for saved_path in file_paths:
-                    if os.path.exists(saved_path):
-                        os.remove(saved_path)
-                raise HTTPException(status_code=500, detail=f"Failed to save file {file.filename}")
-
-        background_tasks.add_task(process_job, job.id, jd, file_paths)
-        logger.info(f"Started job {job.id} with {len(files)} files")
-
-        return {
-            "job_id": job.id,
-            "message": "Processing started",
-            "total_files": len(files)
-        }
-    except HTTPException:
-        db.close()
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error in start_job: {e}")
-        logger.error(traceback.format_exc())
-        db.close()
-        raise HTTPException(status_code=500, detail="Internal server error")
+        for upload, file_hash, filename in staged:
+            path = commit_upload(job.id, upload, file_hash, filename)
+            file_paths.append(path)
+            file_hashes.append(file_hash)
+            logger.info(f"Saved file: {filename} -> {path}")
+
+        # Job and tasks commit together, so a restart can never lose work
+        # that the client was told had started.
+        setattr(job, 'jd', jd)
+        setattr(job, 'prerank_top_k', prerank_top_k_for(len(file_paths), top_k))
+        setattr(job, 'scoring_backend', backend or None)
+        enqueue_tasks(db, job.id, file_paths, file_hashes)
+        db.commit()
+        job_id = job.id
+        logger.info(f"Started job {job_id} with {len(staged)} files")
     finally:
         db.close()
+    return job_id
+
+
+@app.post("/bulk-job")
+async def bulk_job(
+    jd: str = Form(...),
+    archive: UploadFile | None = File(None),
+    directory: str | None = Form(None),
+    top_k: int | None = Form(None),
+    backend: str | None = Form(None)
+):
+    """
+    Start a job from a ZIP archive upload or a directory under
+    BULK_IMPORT_ROOT. Returns immediately; the job is "ingesting" while
+    files are being enqueued and its total_files grows as they are.
+    """
+    if not jd or not jd.strip():
+        raise HTTPException(status_code=400, detail="Job description cannot be empty")
+    if (archive is None) == (not directory):
+        raise HTTPException(status_code=400, detail="Provide either a ZIP archive or a directory")
+    if backend:
+        try:
+            get_backend(backend)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if directory:
+        try:
+            source = resolve_import_directory(directory)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        # Always on disk: ingestion reads the archive after the request ends
+        source, _, _ = await stage_upload(
+            archive, BULK_MAX_ARCHIVE_BYTES, BULK_MAX_ARCHIVE_BYTES, max_memory_bytes=0
+        )
+        if not zipfile.is_zipfile(source):
+            discard_staged([source])
+            raise HTTPException(status_code=400, detail=f"{archive.filename} is not a ZIP archive")
+
+    job_id = await run_in_threadpool(create_bulk_job, jd, backend or None)
+    start_ingest(job_id, source, top_k, remove_source=archive is not None)
+    logger.info(f"Started bulk job {job_id} from {archive.filename if archive else directory}")
+
+    return {
+        "job_id": job_id,
+        "message": "Ingestion started"
+    }
+
+
+CANDIDATE_FIELDS = {
+    "id": Candidate.id,
+    "name": Candidate.name,
+    "score": Candidate.score,
+    "classification": Candidate.classification,
+    "summary": Candidate.summary,
+    "duplicate_of": Candidate.duplicate_of,
+    "scored_locally": Candidate.scored_locally,
+}
+
+
+def _etag_matches(if_none_match, etag):
+    """If-None-Match check: a list of entity tags or "*", compared weakly"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
 
 
 @app.get("/job-status/{job_id}")
-def job_status(job_id: int):
+def job_status(
+    job_id: int,
+    request: Request,
+    since: int | None = Query(None, ge=0, description="Only candidates with id > since"),
+    limit: int | None = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    fields: str | None = Query(None, description="Comma separated candidate fields")
+):
     if job_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid job ID")
-    
+    # The cursor covers every row with a larger id, but pages are cut in
+    # rank order, so a page would move it past rows the client never got
+    if since is not None and (limit is not None or offset):
+        raise HTTPException(status_code=400, detail="since cannot be combined with limit or offset")
+
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in CANDIDATE_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(CANDIDATE_FIELDS)}"
+            )
+    else:
+        selected = list(CANDIDATE_FIELDS)
+
     db = SessionLocal()
     try:
         job = db.query(Job).filter(Job.id == job_id).first()
@@ -136,24 +315,48 @@ def job_status(job_id: int):
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
 
-        candidates = db.query(Candidate).filter(
+        # Every candidate commits together with its processed_files bump, so
+        # this cheap aggregate identifies the response without loading rows.
+        count, cursor = db.query(
+            func.count(Candidate.id), func.max(Candidate.id)
+        ).filter(Candidate.job_id == job_id).one()
+        cursor = cursor or 0
+        # Results finished by this process's workers but not flushed yet
+        processed = job.processed_files + result_writer.pending(job_id)
+
+        version = f"{job_id}:{job.status}:{processed}:{job.total_files}:{count}:{cursor}:{request.url.query}"
+        etag = f'W/"{hashlib.sha1(version.encode()).hexdigest()[:20]}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        query = db.query(*[CANDIDATE_FIELDS[field] for field in selected]).filter(
             Candidate.job_id == job_id
-        ).order_by(Candidate.score.desc()).all()
-
-        return {
-            "status": job.status,
-            "processed": job.processed_files,
-            "total": job.total_files,
-            "candidates": [
-                {
-                    "name": c.name,
-                    "score": float(f"{c.score:.1f}"),
-                    "classification": c.classification,
-                    "summary": c.summary
-                }
-                for c in candidates
-            ]
-        }
+        )
+        if since is not None:
+            query = query.filter(Candidate.id > since)
+        query = query.order_by(Candidate.scored_locally, Candidate.score.desc(), Candidate.id).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+
+        candidates = []
+        for row in query:
+            candidate = dict(row._mapping)
+            if "score" in candidate:
+                candidate["score"] = float(f"{candidate['score']:.1f}")
+            candidates.append(candidate)
+
+        return JSONResponse(
+            content={
+                "status": job.status,
+                "processed": processed,
+                "total": job.total_files,
+                "cursor": cursor,
+                "candidates": candidates
+            },
+            headers=headers
+        )
     except HTTPException:
         db.close()
         raise
@@ -163,3 +366,187 @@ def job_status(job_id: int):
         raise HTTPException(status_code=500, detail="Internal server error")
     finally:
         db.close()
+
+
+# Candidates fetched from the database per round trip while exporting; the
+# export holds one such batch in memory whatever the job's size.
+EXPORT_BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", "500"))
+KEYWORD_FIELDS = {
+    "matched_keywords": Candidate.matched_keywords,
+    "match_ratio": Candidate.match_ratio,
+}
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _export_rows(job_id, columns):
+    """Yield a job's candidates as dicts in score order, EXPORT_BATCH_ROWS at a time"""
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(*columns.values())
+            .filter(Candidate.job_id == job_id)
+            .order_by(Candidate.scored_locally, Candidate.score.desc(), Candidate.id)
+            .yield_per(EXPORT_BATCH_ROWS)
+        )
+        for row in query:
+            candidate = dict(zip(columns, row))
+            candidate["score"] = float(f"{candidate['score']:.1f}")
+            yield candidate
+    finally:
+        db.close()
+
+
+def _export_chunks(rows, fields, export_format):
+    """Encode rows as CSV or NDJSON, one chunk per EXPORT_BATCH_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields) if export_format == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+    for count, row in enumerate(rows, 1):
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            if "matched_keywords" in row:
+                row["matched_keywords"] = (row["matched_keywords"] or "").split()
+            buffer.write(json.dumps(row) + "\n")
+        if count % EXPORT_BATCH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@app.get("/job-export/{job_id}")
+def job_export(
+    job_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    keywords: bool = Query(False, description="Add matched_keywords and match_ratio")
+):
+    """
+    Stream all of a job's candidates in score order as CSV or NDJSON.
+    Rows are read and sent in batches, so memory stays flat for any job size.
+    """
+    if job_id <= 0:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+
+    db = SessionLocal()
+    try:
+        if db.query(Job.id).filter(Job.id == job_id).first() is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+    finally:
+        db.close()
+
+    columns = {**CANDIDATE_FIELDS, **(KEYWORD_FIELDS if keywords else {})}
+    return StreamingResponse(
+        _export_chunks(_export_rows(job_id, columns), list(columns), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="job-{job_id}.{format}"'}
+    )
+
+
+# How long an event stream waits for a pushed event before re-reading the
+# job from the database. This also picks up progress made by workers in
+# other processes, which the in-process broker cannot see.
+SSE_RESYNC_SECONDS = float(os.environ.get("SSE_RESYNC_SECONDS", "5"))
+FINAL_STATUSES = {"completed", "completed_with_errors", "failed"}
+
+
+def _load_job_progress(job_id, after_id=None):
+    """Job progress plus candidates written after after_id (blocking DB call)"""
+    db = SessionLocal()
+    try:
+        job = db.query(
+            Job.status,
+            Job.processed_files.label("processed"),
+            Job.total_files.label("total")
+        ).filter(Job.id == job_id).first()
+        if job is None:
+            return None, []
+
+        progress = dict(job._mapping)
+        if after_id is None:
+            return progress, []
+
+        candidates = db.query(Candidate).filter(
+            Candidate.job_id == job_id, Candidate.id > after_id
+        ).order_by(Candidate.id).all()
+        return progress, [candidate_payload(c) for c in candidates]
+    finally:
+        db.close()
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/job-events/{job_id}")
+async def job_events(job_id: int, request: Request, since: int = 0):
+    """
+    Server-sent events for one job. Sends a snapshot of everything after
+    candidate id `since`, then one `progress` event per finished file (with
+    only the new candidate row), and a final `done` event.
+    """
+    if job_id <= 0:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+
+    progress, _ = await run_in_threadpool(_load_job_progress, job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        # Subscribe before reading the snapshot so no event falls in between
+        subscriber = broker.subscribe(job_id)
+        _, queue = subscriber
+        getter = None
+        last_id = since
+        try:
+            progress, candidates = await run_in_threadpool(_load_job_progress, job_id, since)
+            if progress is None:
+                return
+            yield _sse("snapshot", {**progress, "candidates": candidates})
+            last_id = max([last_id] + [c["id"] for c in candidates])
+            status = progress["status"]
+
+            while status not in FINAL_STATUSES:
+                if await request.is_disconnected():
+                    return
+                # asyncio.wait (unlike wait_for) never cancels the getter, so
+                # an event arriving right at the timeout is not lost.
+                if getter is None:
+                    getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=SSE_RESYNC_SECONDS)
+                if done:
+                    events = [getter.result()]
+                    getter = None
+                else:
+                    latest, missed = await run_in_threadpool(_load_job_progress, job_id, last_id)
+                    if latest is None:
+                        return
+                    events = [{**latest, "candidate": c} for c in missed]
+                    if not events and latest != progress:
+                        events = [latest]
+                    if not events:
+                        yield ": keepalive\n\n"
+
+                for event in events:
+                    candidate = event.get("candidate")
+                    if candidate is not None:
+                        if candidate["id"] <= last_id:
+                            continue
+                        last_id = candidate["id"]
+                    progress = {key: event[key] for key in ("status", "processed", "total")}
+                    status = progress["status"]
+                    yield _sse("progress", event)
+
+            yield _sse("done", {"status": status})
+        finally:
+            if getter is not None:
+                getter.cancel()
+            broker.unsubscribe(job_id, subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,185 @@
+"""
+Process-local metrics exposed in the Prometheus text format at /metrics,
+plus optional tracing spans.
+
+Counters and histograms are plain dicts guarded by a lock, so recording a
+sample costs a dict lookup and an addition. Standalone workers serve their
+own metrics with `python -m app.worker --metrics-port 9100`.
+
+Spans go through the OpenTelemetry API when it is installed (configure an
+SDK and exporter to ship them); without it span() is a no-op.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:
+    _otel_trace = None
+
+_registry = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        # key -> [per-bucket counts (last slot is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            entry = self._values.get(key)
+            return sum(entry[0]) if entry else 0
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def span(name, **attributes):
+    """Context manager for a tracing span; a no-op without OpenTelemetry"""
+    if _otel_trace is None:
+        return nullcontext()
+    return _otel_trace.get_tracer("resume-pipeline").start_as_current_span(name, attributes=attributes)
+
+
+# -----------------------------
+# PIPELINE METRICS
+# -----------------------------
+EXTRACTION_SECONDS = Histogram(
+    "resume_extraction_seconds", "Text extraction time per file (text cache misses)",
+    ["format"], buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "resume_llm_request_seconds", "Scoring backend call latency, including client retries",
+    ["backend", "outcome"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+LLM_RETRIES = Counter(
+    "resume_llm_retries_total", "LLM HTTP attempts that were retried", ["host"]
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "resume_queue_wait_seconds", "Time from enqueue to the first claim of a file task",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+)
+DB_COMMIT_SECONDS = Histogram(
+    "resume_db_commit_seconds", "Session commit time, including the flush",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+FUNCTION_SECONDS = Histogram(
+    "resume_function_seconds", "Duration of functions wrapped with utils.timing_decorator",
+    ["function"]
+)
+SCORING_FALLBACKS = Counter(
+    "resume_scoring_fallbacks_total", "Resumes scored by keyword fallback instead of the LLM", ["reason"]
+)
+CACHE_LOOKUPS = Counter(
+    "resume_cache_lookups_total", "Cache lookups by result", ["cache", "result"]
+)
+CACHE_EVICTIONS = Counter(
+    "resume_cache_evictions_total", "Entries evicted from a cache", ["cache"]
+)
+DUPLICATES_REUSED = Counter(
+    "resume_duplicates_reused_total", "Resumes that reused a near-duplicate's score instead of being scored",
+    ["match"]
+)
+ORPHANED_UPLOADS_REMOVED = Counter(
+    "resume_orphaned_uploads_removed_total", "Uploads no task would read, removed by the janitor", ["kind"]
+)
+FILES_PROCESSED = Counter(
+    "resume_files_processed_total", "File tasks finished, by final status", ["status"]
+)
@@ -0,0 +1,187 @@
+"""
+Deterministic stand-in for the Ollama chat API, used by the "mock" scoring
+backend for load tests and CI.
+
+POST /api/chat answers the single and batched scoring prompts of
+llm_service with scores derived from a hash of each resume, so the same
+input always scores the same. Latency, jitter and the share of requests
+failing with HTTP 503 are configurable; failures are decided per
+(prompt, attempt), so a retried request can succeed and runs reproduce.
+
+    python -m app.mock_llm_server --port 11500 --latency 0.2 --error-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+MOCK_LLM_PORT = int(os.environ.get("MOCK_LLM_PORT", "11500"))
+MOCK_LLM_LATENCY = float(os.environ.get("MOCK_LLM_LATENCY", "0.2"))
+MOCK_LLM_JITTER = float(os.environ.get("MOCK_LLM_JITTER", "0.1"))
+MOCK_LLM_ERROR_RATE = float(os.environ.get("MOCK_LLM_ERROR_RATE", "0"))
+MOCK_LLM_SEED = os.environ.get("MOCK_LLM_SEED", "0")
+# Distinct prompts whose attempt count is remembered; the least recently
+# seen are forgotten first, so a long load test keeps a bounded footprint
+MOCK_LLM_TRACKED_PROMPTS = int(os.environ.get("MOCK_LLM_TRACKED_PROMPTS", "10000"))
+
+_RESUME_RE = re.compile(r"^RESUME(?: (\d+))?:\n", re.MULTILINE)
+
+
+def _unit(*parts):
+    """Deterministic float in [0, 1) from the given parts"""
+    digest = hashlib.sha256("\x00".join(str(p) for p in parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def _mock_result(resume_text, seed):
+    lines = [line.strip() for line in resume_text.strip().splitlines() if line.strip()]
+    score = 30 + int(_unit(seed, resume_text) * 66)
+    if score >= 85:
+        classification = "Excellent"
+    elif score >= 75:
+        classification = "Strong"
+    elif score >= 60:
+        classification = "Partial"
+    else:
+        classification = "Weak"
+    return {
+        "name": lines[0][:60] if lines else "Unknown",
+        "score": score,
+        "classification": classification,
+        "summary": "Mock evaluation"
+    }
+
+
+def mock_reply(prompt, seed):
+    """The assistant message content for a scoring prompt"""
+    sections = list(_RESUME_RE.finditer(prompt))
+    texts = [
+        prompt[match.end():sections[i + 1].start() if i + 1 < len(sections) else len(prompt)]
+        for i, match in enumerate(sections)
+    ]
+    if sections and sections[0].group(1) is not None:
+        return json.dumps([
+            {"index": int(match.group(1)), **_mock_result(text, seed)}
+            for match, text in zip(sections, texts)
+        ])
+    return json.dumps(_mock_result(texts[0] if texts else prompt, seed))
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency, jitter, error_rate, seed, tracked_prompts=MOCK_LLM_TRACKED_PROMPTS):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.tracked_prompts = max(1, tracked_prompts)
+        # Prompt digest -> attempts so far, least recently seen first
+        self.attempts = OrderedDict()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_attempt(self, prompt_key):
+        with self._lock:
+            self.requests += 1
+            attempt = self.attempts.pop(prompt_key, 0) + 1
+            self.attempts[prompt_key] = attempt
+            if len(self.attempts) > self.tracked_prompts:
+                self.attempts.popitem(last=False)
+            return attempt
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            prompt = payload["messages"][-1]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send(400, {"error": "invalid chat request"})
+            return
+        if self.path != "/api/chat":
+            self._send(404, {"error": "not found"})
+            return
+
+        server = self.server
+        prompt_key = hashlib.sha256(prompt.encode()).hexdigest()
+        attempt = server.next_attempt(prompt_key)
+        time.sleep(max(0.0, server.latency + server.jitter * (2 * _unit(server.seed, prompt_key, attempt, "latency") - 1)))
+
+        if _unit(server.seed, prompt_key, attempt, "error") < server.error_rate:
+            self._send(503, {"error": "mock overloaded"})
+            return
+
+        self._send(200, {
+            "model": payload.get("model", "mock"),
+            "message": {"role": "assistant", "content": mock_reply(prompt, server.seed)},
+            "done": True
+        })
+
+
+def start_mock_server(
+    host="127.0.0.1",
+    port=MOCK_LLM_PORT,
+    latency=MOCK_LLM_LATENCY,
+    jitter=MOCK_LLM_JITTER,
+    error_rate=MOCK_LLM_ERROR_RATE,
+    seed=MOCK_LLM_SEED,
+    tracked_prompts=MOCK_LLM_TRACKED_PROMPTS
+):
+    """Serve in a daemon thread and return the server; call shutdown() to stop.
+    Port 0 picks a free port (see server.server_address)."""
+    server = MockLLMServer((host, port), latency, jitter, error_rate, seed, tracked_prompts)
+    threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic mock of the Ollama chat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_LLM_PORT)
+    parser.add_argument("--latency", type=float, default=MOCK_LLM_LATENCY, help="Mean seconds per request")
+    parser.add_argument("--jitter", type=float, default=MOCK_LLM_JITTER, help="Latency varies by +/- this many seconds")
+    parser.add_argument("--error-rate", type=float, default=MOCK_LLM_ERROR_RATE, help="Share of attempts answered with HTTP 503")
+    parser.add_argument("--seed", default=MOCK_LLM_SEED)
+    parser.add_argument("--tracked-prompts", type=int, default=MOCK_LLM_TRACKED_PROMPTS,
+                        help="Distinct prompts whose retry count is remembered")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockLLMServer(
+        (args.host, args.port), args.latency, args.jitter, args.error_rate, args.seed, args.tracked_prompts
+    )
+    logger.info(f"Mock LLM listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Text
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, Text, Index, LargeBinary
 from .database import Base
 
 
@@ -9,6 +9,23 @@ class Job(Base):
     status = Column(String, default="processing")
     total_files = Column(Integer)
     processed_files = Column(Integer, default=0)
+    jd = Column(Text, nullable=True)
+    # Local pre-ranking: only the best prerank_top_k files go to the LLM
+    prerank_top_k = Column(Integer, nullable=True)
+    ranked_at = Column(Float, nullable=True)
+    rank_lease_expires_at = Column(Float, nullable=True)
+    rank_lease_owner = Column(String, nullable=True)
+    # Claims of the pre-ranking step; capped by TASK_MAX_ATTEMPTS
+    rank_attempts = Column(Integer, default=0)
+    # Name from scoring_backends.BACKENDS; None means SCORING_BACKEND
+    scoring_backend = Column(String, nullable=True)
+    # Bulk ingestion: where it reads from, how many source members it has
+    # enqueued or skipped, and when it last made progress. An "ingesting"
+    # job without a recent heartbeat lost its process and is resumed.
+    ingest_source = Column(String, nullable=True)
+    ingest_remove_source = Column(Boolean, default=False)
+    ingest_position = Column(Integer, default=0)
+    ingest_heartbeat_at = Column(Float, nullable=True)
 
     def __repr__(self):
         return f"<Job(id={self.id}, status={self.status}, processed={self.processed_files}/{self.total_files})>"
@@ -23,6 +40,111 @@ class Candidate(Base):
     score = Column(Float, default=0.0)
     classification = Column(String, default="Partial")
     summary = Column(Text, default="")
+    # Set when the score was reused from this near-duplicate resume
+    duplicate_of = Column(Integer, ForeignKey("candidates.id"), nullable=True)
+    # JD keywords found in the resume (space separated) and their share of
+    # all JD keywords; empty for files that were not scored
+    matched_keywords = Column(Text, nullable=True)
+    match_ratio = Column(Float, nullable=True)
+    # Scored by local pre-ranking instead of the LLM. The two scales are not
+    # comparable, so these rank after every LLM-scored candidate.
+    scored_locally = Column(Boolean, default=False)
+
+    # Serves /job-status: filter by job, read back already in rank order
+    __table_args__ = (
+        Index("ix_candidates_job_id_rank", job_id, scored_locally, score.desc()),
+    )
 
     def __repr__(self):
         return f"<Candidate(id={self.id}, name={self.name}, score={self.score}, classification={self.classification})>"
+
+
+class JobTask(Base):
+    """One file of a job in the durable work queue"""
+    __tablename__ = "job_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"), index=True)
+    position = Column(Integer)
+    file_path = Column(String)
+    file_hash = Column(String, nullable=True)
+    status = Column(String, default="pending")  # pending / leased / done / failed
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(Float, nullable=True)
+    attempts = Column(Integer, default=0)
+    enqueued_at = Column(Float, nullable=True)
+    # Set by pre-ranking for files outside the top-K; used instead of the LLM
+    local_score = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_tasks_status_lease", "status", "lease_expires_at"),
+    )
+
+    def __repr__(self):
+        return f"<JobTask(id={self.id}, job_id={self.job_id}, status={self.status}, attempts={self.attempts})>"
+
+
+class ResumeFingerprint(Base):
+    """MinHash signature of a scored resume (see dedup.py)"""
+    __tablename__ = "resume_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"))
+    job_id = Column(Integer, ForeignKey("jobs.id"), index=True)
+    # Scores are only reused under the same JD, backend and prompt
+    scope = Column(String)
+    signature = Column(LargeBinary)
+    created_at = Column(Float, index=True)
+
+    def __repr__(self):
+        return f"<ResumeFingerprint(id={self.id}, candidate_id={self.candidate_id})>"
+
+
+class LshBucket(Base):
+    """One LSH band of a fingerprint; resumes sharing a band_key are duplicate candidates"""
+    __tablename__ = "lsh_buckets"
+
+    id = Column(Integer, primary_key=True)
+    band_key = Column(String, index=True)
+    fingerprint_id = Column(Integer, ForeignKey("resume_fingerprints.id"), index=True)
+
+    def __repr__(self):
+        return f"<LshBucket(band_key={self.band_key}, fingerprint_id={self.fingerprint_id})>"
+
+
+class ScoreCacheEntry(Base):
+    __tablename__ = "score_cache"
+
+    key = Column(String, primary_key=True)
+    result = Column(Text)
+    latency = Column(Float, default=0.0)
+    created_at = Column(Float, index=True)
+    last_accessed = Column(Float, index=True)
+
+    def __repr__(self):
+        return f"<ScoreCacheEntry(key={self.key[:12]}, last_accessed={self.last_accessed})>"
+
+
+class TextCacheEntry(Base):
+    __tablename__ = "text_cache"
+
+    content_hash = Column(String, primary_key=True)
+    text = Column(Text)
+    name = Column(String, nullable=True)
+    size = Column(Integer, default=0)
+    last_accessed = Column(Float, index=True)
+
+    def __repr__(self):
+        return f"<TextCacheEntry(hash={self.content_hash[:12]}, size={self.size})>"
+
+
+class CacheUsage(Base):
+    """Running size of a capped cache, so stores need not SUM or COUNT it"""
+    __tablename__ = "cache_usage"
+
+    name = Column(String, primary_key=True)
+    bytes = Column(Integer, default=0)
+    entries = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"<CacheUsage(name={self.name}, bytes={self.bytes}, entries={self.entries})>"
@@ -0,0 +1,112 @@
+"""
+Local pre-ranking of a job's resumes against its JD.
+
+Builds a sparse term-frequency matrix over the JD's keyword vocabulary for
+every resume in the job and scores all of them with BM25 in one vectorized
+pass. process_job/workers use it to send only the top-K resumes to the LLM.
+NumPy and SciPy are imported on first use, keeping them out of startup.
+"""
+import re
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Keeps tokens such as c++, c#, node.js and ci/cd-style compounds intact
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on",
+    "at", "to", "for", "of", "with", "by", "is",
+    "are", "was", "were", "be", "been", "have",
+    "has", "had", "as", "from", "this", "that", "will",
+    "we", "you", "our", "your", "it", "its", "who", "can"
+})
+
+
+def tokenize(text):
+    """Lowercase, split into terms and drop stopwords"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".-")
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def classify_score(score):
+    if score >= 75:
+        return "Strong"
+    elif score >= 60:
+        return "Partial"
+    return "Weak"
+
+
+def rank_resumes(jd, resume_texts):
+    """
+    Score every resume against the JD in one pass.
+
+    Returns (bm25, coverage) NumPy arrays with one entry per resume: the
+    BM25 relevance used for ordering, and the fraction of distinct JD
+    keywords present in the resume (the keyword-overlap idea the fallback
+    scorer uses), used for the displayed local score.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    count = len(resume_texts)
+    vocabulary = {term: column for column, term in enumerate(sorted(set(tokenize(jd))))}
+    if not count or not vocabulary:
+        return np.zeros(count), np.zeros(count)
+
+    rows = []
+    columns = []
+    lengths = np.empty(count)
+    for row, text in enumerate(resume_texts):
+        tokens = tokenize(text or "")
+        lengths[row] = len(tokens)
+        for token in tokens:
+            column = vocabulary.get(token)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+
+    # Duplicate (row, column) pairs are summed into term frequencies
+    tf = csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(count, len(vocabulary))
+    )
+    tf.sum_duplicates()
+
+    document_frequency = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf = np.log1p((count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    average_length = lengths.mean() or 1.0
+    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+
+    terms_per_row = np.diff(tf.indptr)
+    row_of_entry = np.repeat(np.arange(count), terms_per_row)
+    weighted = idf[tf.indices] * tf.data * (BM25_K1 + 1) / (tf.data + length_norm[row_of_entry])
+
+    bm25 = np.bincount(row_of_entry, weights=weighted, minlength=count)
+    coverage = terms_per_row / len(vocabulary)
+    return bm25, coverage
+
+
+def select_top_k(jd, resume_texts, top_k):
+    """
+    Split resumes into LLM-worthy and locally scored ones.
+
+    Returns a list with one entry per resume: None for the top_k resumes
+    (score them with the LLM), otherwise the local 0-85 score to use as-is.
+    """
+    import numpy as np
+
+    bm25, coverage = rank_resumes(jd, resume_texts)
+    # Stable sort so ties keep upload order
+    order = np.argsort(-bm25, kind="stable")
+    local_scores = np.minimum(85, (coverage * 100).astype(int))
+
+    selected = [None] * len(resume_texts)
+    for position in order[top_k:]:
+        selected[position] = float(local_scores[position])
+    return selected
@@ -0,0 +1,186 @@
+"""
+Buffered writer for finished file tasks.
+
+Workers hand each result to result_writer.submit() instead of committing
+it themselves. Results are flushed in one transaction when
+RESULT_FLUSH_SIZE are buffered or RESULT_FLUSH_INTERVAL seconds have
+passed: the task rows are marked finished, the Candidate rows are
+bulk-inserted with the fingerprints of newly scored resumes (dedup.py),
+and each job's processed_files is bumped once.
+SSE progress, file cleanup and job finalization happen after the commit.
+Results that are buffered but not yet written are counted by pending(),
+which /job-status adds to processed_files so progress never lags the
+workers.
+
+A worker that dies with unflushed results loses nothing. Its tasks are
+still leased, so they run again once the lease expires.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import insert, update
+
+from .database import SessionLocal
+from .dedup import register_fingerprints
+from .events import broker, candidate_payload
+from .metrics import FILES_PROCESSED
+from .models import Candidate, Job
+from .task_queue import files_in_use, finalize_job, finish_task
+from .upload_service import cleanup_uploaded_files
+
+logger = logging.getLogger(__name__)
+
+RESULT_FLUSH_SIZE = int(os.environ.get("RESULT_FLUSH_SIZE", "50"))
+RESULT_FLUSH_INTERVAL = float(os.environ.get("RESULT_FLUSH_INTERVAL", "0.5"))
+
+
+def job_progress(db, job_id):
+    """The progress fields of a job event, or None if the job is gone"""
+    job = db.query(Job.status, Job.processed_files, Job.total_files).filter(Job.id == job_id).first()
+    if job is None:
+        return None
+    return {
+        "status": job.status,
+        "processed": job.processed_files,
+        "total": job.total_files
+    }
+
+
+def publish_progress(db, job_id):
+    """Push progress to live /job-events streams; skipped when nobody watches"""
+    if not broker.has_subscribers(job_id):
+        return
+    event = job_progress(db, job_id)
+    if event is not None:
+        broker.publish(job_id, event)
+
+
+class ResultWriter:
+    def __init__(self, flush_size=RESULT_FLUSH_SIZE, flush_interval=RESULT_FLUSH_INTERVAL):
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        # Serializes flushes, so results are written in submission order
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+
+    def submit(self, task, status, fields, fingerprint=None):
+        """
+        Buffer one finished task (status "done"/"failed") and its Candidate
+        fields, with the (scope, signature) fingerprint to index, if any.
+        """
+        with self._lock:
+            self._buffer.append((task, status, fields, fingerprint))
+            self._pending[task.job_id] += 1
+            full = len(self._buffer) >= self.flush_size
+            self._start_flusher()
+        if full:
+            self.flush()
+
+    def pending(self, job_id):
+        """Results for job_id that are buffered but not committed yet"""
+        with self._lock:
+            return self._pending.get(job_id, 0)
+
+    def _start_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run, name="result-writer", daemon=True)
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Result writer flush failed: {e}")
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of results written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            db = SessionLocal()
+            try:
+                written = self._write(db, batch)
+                db.commit()
+            except Exception as e:
+                logger.error(f"Failed to record {len(batch)} results: {e}")
+                db.rollback()
+                written = []
+            finally:
+                self._release(batch)
+
+            try:
+                self._after_commit(db, batch, written)
+            finally:
+                db.close()
+            return len(written)
+
+    def _release(self, batch):
+        with self._lock:
+            self._pending.subtract(task.job_id for task, _, _, _ in batch)
+            self._pending = +self._pending
+
+    def _write(self, db, batch):
+        """Finish tasks, insert candidates and bump progress. Returns [(task, status, payload)]."""
+        # Results whose lease was lost belong to whichever worker reclaimed
+        # the task; drop them instead of writing duplicates.
+        finished = [item for item in batch if finish_task(db, item[0], item[1])]
+        if not finished:
+            return []
+
+        candidates = db.execute(
+            insert(Candidate).returning(Candidate, sort_by_parameter_order=True),
+            [{"job_id": task.job_id, **fields} for task, _, fields, _ in finished]
+        ).scalars().all()
+        register_fingerprints(db, [
+            (candidate.id, task.job_id, *fingerprint)
+            for (task, _, _, fingerprint), candidate in zip(finished, candidates)
+            if fingerprint is not None
+        ])
+        for job_id, count in Counter(task.job_id for task, _, _, _ in finished).items():
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id)
+                .values(processed_files=Job.processed_files + count)
+                .execution_options(synchronize_session=False)
+            )
+        return [
+            (task, status, candidate_payload(candidate))
+            for (task, status, _, _), candidate in zip(finished, candidates)
+        ]
+
+    def _after_commit(self, db, batch, written):
+        # Every row of a flush was committed together, so one progress read
+        # per watched job serves all of its events
+        progress = {}
+        for task, status, payload in written:
+            FILES_PROCESSED.inc(status=status)
+            if broker.has_subscribers(task.job_id):
+                if task.job_id not in progress:
+                    progress[task.job_id] = job_progress(db, task.job_id)
+                if progress[task.job_id] is not None:
+                    broker.publish(task.job_id, {**progress[task.job_id], "candidate": payload})
+            if status == "done":
+                logger.info(f"Successfully processed: {os.path.basename(task.file_path)}")
+
+        # Identical uploads in a job share one file; keep it until the last
+        # task that reads it has finished.
+        used = {(task.job_id, task.file_path) for task, _, _ in written}
+        cleanup_uploaded_files({path for _, path in used - files_in_use(db, used)})
+
+        for job_id in {task.job_id for task, _, _, _ in batch}:
+            if finalize_job(db, job_id):
+                publish_progress(db, job_id)
+
+
+result_writer = ResultWriter()
@@ -1,177 +1,452 @@
-import pdfplumber
-from docx import Document
+import io
+import os
 import re
-from typing import Optional
+import shlex
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from contextlib import closing
+from functools import lru_cache
+from typing import Optional, Union
+
+# pdfplumber (with pdfminer) and pypdfium2 are imported on first use: they
+# add most of a second to API and worker startup.
+
+# Scoring packs each resume into LLM_RESUME_TOKEN_BUDGET tokens (about 4
+# characters each), keeping the lines with the most JD keywords (see
+# llm_service.pack_resume). Extraction reads EXTRACT_HEADROOM times that, so
+# packing has real text to choose from, and stops there on long documents.
+EXTRACT_HEADROOM = 4
+EXTRACT_MAX_CHARS = int(os.environ.get("LLM_RESUME_TOKEN_BUDGET", "750")) * 4 * EXTRACT_HEADROOM
+
+# PDF pages stop being read once this many characters are collected (the
+# first page, which holds the name, is always read). 0 reads every page.
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", str(EXTRACT_MAX_CHARS)))
+
+# pdfplumber keeps complex layouts (columns, tables) intact; "pdfium" is a
+# much faster text-only engine for plain PDFs; "auto" tries pdfium first and
+# falls back to pdfplumber for pages it returns no text for.
+PDF_ENGINE = os.environ.get("PDF_ENGINE", "pdfplumber")
+
+# Separates PDF pages in extracted text. The form feed lets prompt packing
+# tell page headers and footers from ordinary repeated lines; on a line of
+# its own it is blank to everything that splits on newlines.
+PAGE_BREAK = "\n\f\n"
+
+# Extractors read a file path, or the file's bytes for uploads held in memory
+Source = Union[str, bytes]
+
+
+def _readable(source: Source):
+    """What zipfile and pdfplumber open: the path, or a buffer over the bytes"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+# -----------------------------
+# NAME EXTRACTION
+# -----------------------------
+# Names sit at the top of a resume, so the regex heuristics only scan this
+# many leading characters (cut back to a line boundary) instead of the
+# whole document.
+NAME_HEADER_CHARS = 3000
+NAME_HEADER_LINES = 8
+
+_HEADER_WORDS = ('resume', 'cv', 'curriculum', 'vitae', 'application', 'profile', 'objective', 'summary', 'professional')
+_NON_NAME_PHRASES = ('contact information', 'professional experience', 'education summary', 'skills overview', 'work history', 'education', 'experience', 'skills')
+_SKIP_WORDS = ('resume', 'cv', 'curriculum', 'vitae', 'experience', 'education', 'skills', 'contact', 'phone', 'email', 'address', 'linkedin', 'github', 'portfolio', 'website', 'professional', 'summary', 'objective', 'analyst', 'developer', 'engineer')
+
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_NAME_PATTERNS = tuple(re.compile(pattern, re.MULTILINE | re.IGNORECASE) for pattern in (
+    r'(?:Name|Full Name|Candidate Name|Applicant)[:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+    r'^([A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*(?:\n|$)',  # Line with capitalized name (exclude common non-name words)
+    r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:Email|Phone|Resume)',  # Name before contact info (removed "Contact")
+))
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Simpler first-lines heuristic used by the keyword fallback scorer
+_FALLBACK_SKIP_PHRASES = ("email", "phone", "address", "objective", "summary", "experience", "education", "skills", "resume", "cv")
+_FALLBACK_NAME_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'^[A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)?',
+    r'^[A-Z]\. [A-Z][a-z]+',
+    r'^[A-Z][a-z]+, [A-Z]\.',
+    r'^[A-Z][a-z]+ [A-Z]\. [A-Z][a-z]+',
+))
+
+
+def _header(text: str) -> str:
+    if len(text) <= NAME_HEADER_CHARS:
+        return text
+    cut = text.rfind('\n', 0, NAME_HEADER_CHARS)
+    return text[:cut] if cut > 0 else text[:NAME_HEADER_CHARS]
+
+
+def _first_lines(text: str, count: int) -> list:
+    """The first `count` non-blank lines, stripped, without splitting the whole text"""
+    lines = []
+    start = 0
+    while len(lines) < count and start <= len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text)
+        line = text[start:end].strip()
+        if line:
+            lines.append(line)
+        start = end + 1
+    return lines
+
+
+def _name_from_line(line: str) -> Optional[str]:
+    """A 2-4 word line whose words are (hyphenated) letters only"""
+    if len(line) >= 50:
+        return None
+    words = line.split()
+    if not 2 <= len(words) <= 4:
+        return None
+    name_words = []
+    for word in words:
+        # Remove common non-name characters
+        clean_word = _NON_WORD_RE.sub('', word)
+        if clean_word.isalpha() or clean_word.replace('-', '').isalpha():
+            name_words.append(clean_word)
+    return ' '.join(name_words) if len(name_words) >= 2 else None
+
+
+def _name_from_email(local_part: str) -> Optional[str]:
+    # john.doe -> John Doe
+    if '.' in local_part:
+        parts = local_part.split('.')
+        name = ' '.join(part.capitalize() for part in parts[:2] if part.isalpha())
+    # johndoe -> John Doe (if reasonable length)
+    elif 6 <= len(local_part) <= 20:
+        name = None
+        for i in range(3, min(8, len(local_part))):
+            first, second = local_part[:i], local_part[i:]
+            if first.isalpha() and second.isalpha():
+                name = f"{first.capitalize()} {second.capitalize()}"
+                break
+    else:
+        return None
+    return name if name and len(name.split()) >= 2 else None
 
 
 def extract_name_from_text(text: str) -> Optional[str]:
     """
-    Extract candidate name from resume text using multiple patterns
+    Extract candidate name from resume text using multiple patterns, in
+    order: the first line (or the second, after a "Resume"/"CV" style
+    header), "Name:" style labels, the email address, capitalized words in
+    the first lines, and finally a dotted email address of up to 3 parts.
     """
     if not text or len(text.strip()) < 10:
         return None
-    
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    
-    # Pattern 1: First line (most common for resumes)
+
+    lines = _first_lines(text, NAME_HEADER_LINES)
+    header = _header(text)
+
+    # Pattern 1: First line (most common for resumes), or the second line
+    # if the first is a header
     if lines:
-        first_line = lines[0]
-        
-        # Skip if first line contains common header words
-        header_words = ['resume', 'cv', 'curriculum', 'vitae', 'application', 'profile', 'objective', 'summary', 'professional']
-        if not any(header_word.lower() in first_line.lower() for header_word in header_words):
-            if len(first_line.split()) >= 2 and len(first_line) < 50:
-                # Check if it looks like a name (2-4 words, mostly letters)
-                words = first_line.split()
-                if 2 <= len(words) <= 4:
-                    name_words = []
-                    for word in words:
-                        # Remove common non-name characters
-                        clean_word = re.sub(r'[^\w\s-]', '', word)
-                        if clean_word.isalpha() or clean_word.replace('-', '').isalpha():
-                            name_words.append(clean_word)
-                    
-                    if name_words and len(name_words) >= 2:
-                        return ' '.join(name_words)
-    
-    # Pattern 1b: Check second line if first is a header
-    if len(lines) > 1:
-        first_line = lines[0]
-        second_line = lines[1]
-        
-        # If first line is a header, check second line for name
-        header_words = ['resume', 'cv', 'curriculum', 'vitae', 'application', 'profile', 'objective', 'summary', 'professional']
-        if any(header_word.lower() in first_line.lower() for header_word in header_words):
-            if len(second_line.split()) >= 2 and len(second_line) < 50:
-                # Check if second line looks like a name
-                words = second_line.split()
-                if 2 <= len(words) <= 4:
-                    name_words = []
-                    for word in words:
-                        clean_word = re.sub(r'[^\w\s-]', '', word)
-                        if clean_word.isalpha() or clean_word.replace('-', '').isalpha():
-                            name_words.append(clean_word)
-                    
-                    if name_words and len(name_words) >= 2:
-                        return ' '.join(name_words)
-    
+        first_lower = lines[0].lower()
+        if not any(word in first_lower for word in _HEADER_WORDS):
+            name = _name_from_line(lines[0])
+            if name:
+                return name
+        elif len(lines) > 1:
+            name = _name_from_line(lines[1])
+            if name:
+                return name
+
     # Pattern 2: Look for "Name:" or similar patterns
-    name_patterns = [
-        r'(?:Name|Full Name|Candidate Name|Applicant)[:\s]+([A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-        r'^([A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*(?:\n|$)',  # Line with capitalized name (exclude common non-name words)
-        r'([A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:Email|Phone|Resume)',  # Name before contact info (removed "Contact")
-    ]
-    
-    for pattern in name_patterns:
-        matches = re.findall(pattern, text, re.MULTILINE | re.IGNORECASE)
-        for match in matches:
-            potential_name = match.strip()
+    for pattern in _NAME_PATTERNS:
+        for match in pattern.finditer(header):
+            potential_name = match.group(1).strip()
             if len(potential_name.split()) >= 2 and len(potential_name) < 50:
                 # Additional validation: exclude common non-name phrases
-                non_name_phrases = ['contact information', 'professional experience', 'education summary', 'skills overview', 'work history', 'education', 'experience', 'skills']
-                if not any(phrase.lower() in potential_name.lower() for phrase in non_name_phrases):
+                lower = potential_name.lower()
+                if not any(phrase in lower for phrase in _NON_NAME_PHRASES):
                     return potential_name
-    
+
     # Pattern 3: Look for email addresses and extract name from them
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, text)
-    
-    if emails:
-        # Pattern 3a: If first line is header, extract from email
-        if lines:
-            first_line = lines[0]
-            header_words = ['resume', 'cv', 'curriculum', 'vitae', 'application', 'profile']
-            if any(header_word.lower() in first_line.lower() for header_word in header_words):
-                email = emails[0]
-                local_part = email.split('@')[0]
-                
-                if '.' in local_part:
-                    parts = local_part.split('.')
-                    if len(parts) >= 2:
-                        name_from_email = ' '.join(part.capitalize() for part in parts[:2] if part.isalpha())
-                        if name_from_email and len(name_from_email.split()) >= 2:
-                            return name_from_email
-        
-        # Pattern 3b: General email extraction (fallback)
-        email = emails[0]
-        local_part = email.split('@')[0]
-        
-        # Handle common name patterns in emails
-        name_from_email = None
-        
-        # john.doe -> John Doe
-        if '.' in local_part:
-            parts = local_part.split('.')
-            if len(parts) >= 2:
-                name_from_email = ' '.join(part.capitalize() for part in parts[:2] if part.isalpha())
-        
-        # johndoe -> John Doe (if reasonable length)
-        elif len(local_part) >= 6 and len(local_part) <= 20:
-            # Try to split common name patterns
-            for i in range(3, min(8, len(local_part))):
-                first = local_part[:i]
-                second = local_part[i:]
-                if first.isalpha() and second.isalpha():
-                    name_from_email = f"{first.capitalize()} {second.capitalize()}"
-                    break
-        
-        if name_from_email and len(name_from_email.split()) >= 2:
-            return name_from_email
-    
+    email = _EMAIL_RE.search(header)
+    local_part = email.group(0).split('@')[0] if email else None
+    if local_part is not None:
+        name = _name_from_email(local_part)
+        if name:
+            return name
+
     # Pattern 4: Look for capitalized 2-4 word combinations in first few lines
-    for i in range(min(8, len(lines))):
-        line = lines[i]
+    for line in lines:
         # Skip if it contains common non-name content
-        skip_words = ['resume', 'cv', 'curriculum', 'vitae', 'experience', 'education', 'skills', 'contact', 'phone', 'email', 'address', 'linkedin', 'github', 'portfolio', 'website', 'professional', 'summary', 'objective', 'analyst', 'developer', 'engineer']
-        if any(skip_word.lower() in line.lower() for skip_word in skip_words):
+        lower = line.lower()
+        if any(skip_word in lower for skip_word in _SKIP_WORDS):
             continue
-            
-        # Look for capitalized name patterns
+
         words = line.split()
         if 2 <= len(words) <= 4:
             capitalized_words = []
             for word in words:
-                cleaned = re.sub(r'[^\w\s-]', '', word)
+                cleaned = _NON_WORD_RE.sub('', word)
                 # Check if word starts with capital and is mostly letters
                 if cleaned and cleaned[0].isupper() and sum(c.isalpha() for c in cleaned) > len(cleaned) * 0.8:
                     capitalized_words.append(cleaned)
-            
+
             if len(capitalized_words) >= 2:
                 return ' '.join(capitalized_words)
-    
-    # Pattern 5: Enhanced email extraction for names
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    emails = re.findall(email_pattern, text)
-    if emails:
-        email = emails[0]
-        local_part = email.split('@')[0]
-        
-        # More sophisticated email name extraction
-        if '.' in local_part:
-            parts = local_part.split('.')
-            # Filter out numbers and common non-name patterns
-            name_parts = []
-            for part in parts[:3]:  # Look at first 3 parts max
-                if part.isalpha() and len(part) > 1:
-                    name_parts.append(part.capitalize())
-            
-            if len(name_parts) >= 2:
-                return ' '.join(name_parts)
-    
+
+    # Pattern 5: Dotted email addresses with up to 3 name parts
+    if local_part is not None and '.' in local_part:
+        name_parts = [
+            part.capitalize() for part in local_part.split('.')[:3]
+            if part.isalpha() and len(part) > 1
+        ]
+        if len(name_parts) >= 2:
+            return ' '.join(name_parts)
+
+    return None
+
+
+def extract_header_name(text: str) -> Optional[str]:
+    """The keyword fallback's heuristic: a name-shaped start of one of the first 5 lines"""
+    for line in text.split("\n", 5)[:5]:
+        line = line.strip()
+        if not line or len(line) > 60:
+            continue
+        lower = line.lower()
+        if any(phrase in lower for phrase in _FALLBACK_SKIP_PHRASES):
+            continue
+        for pattern in _FALLBACK_NAME_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                return match.group(0).title()
     return None
 
 
-def extract_text(file_path: str) -> str:
-    """Extract text from resume file"""
-    if file_path.endswith(".pdf"):
-        with pdfplumber.open(file_path) as pdf:
-            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+@lru_cache(maxsize=None)
+def _pypdfium2():
+    """The pypdfium2 module, or None if it is not installed"""
+    try:
+        import pypdfium2
+    except ImportError:  # pdfplumber's own dependency, but treat it as optional
+        return None
+    return pypdfium2
+
+
+def _pdfium_pages(source: Source, start: int, stop: Optional[int]):
+    pdf = _pypdfium2().PdfDocument(source)
+    try:
+        for index in range(start, min(stop, len(pdf)) if stop is not None else len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _pdfplumber_pages(source: Source, start: int, stop: Optional[int]):
+    import pdfplumber
+
+    with pdfplumber.open(_readable(source)) as pdf:
+        for page in pdf.pages[start:stop]:
+            yield page.extract_text() or ""
+            # Parsed layout objects are cached per page; drop them as we go
+            page.close()
+
+
+def _pdf_pages(source: Source, start: int = 0, stop: Optional[int] = None, engine: Optional[str] = None):
+    """Yield the text of pages [start, stop) with the configured engine"""
+    engine = engine or PDF_ENGINE
+    if engine == "pdfplumber" or _pypdfium2() is None:
+        yield from _pdfplumber_pages(source, start, stop)
+        return
+
+    for offset, text in enumerate(_pdfium_pages(source, start, stop)):
+        if engine == "auto" and not text.strip():
+            # Nothing in the text layer pdfium reads; let pdfplumber try
+            text = next(_pdfplumber_pages(source, start + offset, start + offset + 1), "")
+        yield text
+
+
+def pdf_page_count(source: Source) -> int:
+    pypdfium2 = _pypdfium2()
+    if pypdfium2 is not None:
+        pdf = pypdfium2.PdfDocument(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    import pdfplumber
+
+    with pdfplumber.open(_readable(source)) as pdf:
+        return len(pdf.pages)
+
+
+def extract_pdf_pages(source: Source, start: int, stop: int) -> str:
+    """Full text of pages [start, stop), for splitting one PDF across processes"""
+    return PAGE_BREAK.join(_pdf_pages(source, start, stop))
+
+
+def _extract_pdf(source: Source, max_chars: Optional[int] = None) -> str:
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    pages = []
+    collected = 0
+    for text in _pdf_pages(source):
+        pages.append(text)
+        collected += len(text)
+        if max_chars and collected >= max_chars:
+            break
+    return PAGE_BREAK.join(pages)
+
+
+# -----------------------------
+# DOCX / DOC
+# -----------------------------
+# Like PDF_MAX_CHARS, for .docx; 0 reads the whole document.
+DOCX_MAX_CHARS = int(os.environ.get("DOCX_MAX_CHARS", str(EXTRACT_MAX_CHARS)))
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+# Text boxes are stored twice: as DrawingML (mc:Choice) and as VML for old
+# readers (mc:Fallback). Only the first copy is read.
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_DOCX_HEADER_RE = re.compile(r"word/header\d*\.xml")
 
-    elif file_path.endswith(".docx"):
-        doc = Document(file_path)
-        return "\n".join(p.text for p in doc.paragraphs)
 
-    return ""
+def _docx_part_paragraphs(archive, part):
+    """Yield the paragraph texts of one XML part, dropping parsed elements as it goes"""
+    from xml.etree.ElementTree import iterparse
+
+    with archive.open(part) as stream:
+        stack = []
+        # Text of each open paragraph; text box paragraphs nest inside others
+        paragraphs = []
+        in_fallback = 0
+        for event, element in iterparse(stream, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                stack.append(element)
+                if tag == _MC_FALLBACK:
+                    in_fallback += 1
+                elif tag == _W_P and not in_fallback:
+                    paragraphs.append([])
+                continue
+
+            stack.pop()
+            if tag == _MC_FALLBACK:
+                in_fallback -= 1
+            elif in_fallback or not paragraphs:
+                pass
+            elif tag == _W_T:
+                paragraphs[-1].append(element.text or "")
+            elif tag == _W_TAB:
+                paragraphs[-1].append("\t")
+            elif tag in (_W_BR, _W_CR):
+                paragraphs[-1].append("\n")
+            elif tag == _W_P:
+                yield "".join(paragraphs.pop())
+
+            # Finished blocks under the body (or header root) are not needed again
+            if 0 < len(stack) <= 2:
+                stack[-1].clear()
+
+
+def iter_docx_paragraphs(source: Source):
+    """
+    Paragraph texts of a .docx, streamed from the zip without building a
+    document model: page headers first (often where the name is), then
+    the body, including tables and text boxes.
+    """
+    with zipfile.ZipFile(_readable(source)) as archive:
+        headers = sorted(name for name in archive.namelist() if _DOCX_HEADER_RE.fullmatch(name))
+        seen = set()
+        for part in headers:
+            # First-page, even-page and default headers often repeat
+            text = "\n".join(p for p in _docx_part_paragraphs(archive, part) if p.strip())
+            if text and text not in seen:
+                seen.add(text)
+                yield text
+        yield from _docx_part_paragraphs(archive, "word/document.xml")
+
+
+def extract_docx_text(source: Source, max_chars: Optional[int] = None) -> str:
+    max_chars = DOCX_MAX_CHARS if max_chars is None else max_chars
+    paragraphs = []
+    collected = 0
+    with closing(iter_docx_paragraphs(source)) as texts:
+        for text in texts:
+            paragraphs.append(text)
+            collected += len(text) + 1
+            if max_chars and collected >= max_chars:
+                break
+    return "\n".join(paragraphs)
+
+
+# Legacy .doc files need an external converter that prints their text:
+# DOC_CONVERTER (a command line, "{path}" is replaced by the file), or else
+# the first of DOC_CONVERTERS found on PATH.
+DOC_CONVERTER = os.environ.get("DOC_CONVERTER", "")
+DOC_CONVERTERS = (
+    ("antiword", "antiword {path}"),
+    ("catdoc", "catdoc -w {path}"),
+    ("soffice", "soffice --headless --cat {path}"),
+)
+DOC_CONVERTER_TIMEOUT = int(os.environ.get("DOC_CONVERTER_TIMEOUT", "60"))
+
+
+@lru_cache(maxsize=None)
+def _doc_converter():
+    if DOC_CONVERTER:
+        return DOC_CONVERTER
+    for executable, command in DOC_CONVERTERS:
+        if shutil.which(executable):
+            return command
+    return None
+
+
+def extract_doc_text(source: Source, max_chars: Optional[int] = None) -> str:
+    command = _doc_converter()
+    if command is None:
+        raise RuntimeError("No .doc converter available (install antiword or catdoc, or set DOC_CONVERTER)")
+    if isinstance(source, bytes):
+        # Converters only read files
+        with tempfile.NamedTemporaryFile(suffix=".doc") as temp:
+            temp.write(source)
+            temp.flush()
+            return extract_doc_text(temp.name, max_chars)
+    args = [part.replace("{path}", source) for part in shlex.split(command)]
+    result = subprocess.run(args, capture_output=True, timeout=DOC_CONVERTER_TIMEOUT)
+    if result.returncode:
+        error = result.stderr.decode("utf-8", errors="replace").strip()[:200]
+        raise RuntimeError(
+            f"{args[0]} exited with status {result.returncode} on {os.path.basename(source)}"
+            + (f": {error}" if error else "")
+        )
+    text = result.stdout.decode("utf-8", errors="replace")
+    return text[:max_chars] if max_chars else text
+
+
+# Extension -> extractor(source, max_chars)
+EXTRACTORS = {
+    ".pdf": _extract_pdf,
+    ".docx": extract_docx_text,
+    ".doc": extract_doc_text,
+}
+
+
+def extract_text(file_path: str, max_chars: Optional[int] = None, data: Optional[bytes] = None) -> str:
+    """
+    Extract text from resume file. PDFs and DOCX files stop after max_chars
+    (default PDF_MAX_CHARS / DOCX_MAX_CHARS, 0 = everything). If data is
+    given it is the file's content and file_path only picks the format.
+    """
+    extractor = EXTRACTORS.get(os.path.splitext(file_path)[1].lower())
+    if extractor is None:
+        return ""
+    return extractor(file_path if data is None else data, max_chars)
 
 
 def extract_candidate_info(file_path: str) -> dict:
@@ -0,0 +1,106 @@
+"""
+Scoring backends. A backend is where score_resume sends its prompts:
+
+- hosted:  Ollama cloud (OLLAMA_HOST, OLLAMA_API_KEY, OLLAMA_MODEL)
+- local:   a self-hosted Ollama (LOCAL_OLLAMA_HOST, LOCAL_OLLAMA_MODEL)
+- keyword: no LLM at all, fallback_score_resume only
+- mock:    the deterministic stand-in server in app.mock_llm_server
+           (MOCK_LLM_HOST), for load tests and CI
+
+SCORING_BACKEND picks the default; /start-job can override it per job.
+"""
+import os
+import time
+
+from . import llm_client
+from .metrics import LLM_REQUEST_SECONDS
+
+SCORING_BACKEND = os.environ.get("SCORING_BACKEND", "hosted")
+# How long Ollama keeps the model (and the cached prompt prefix) loaded
+# after a call; empty leaves the server default.
+LLM_KEEP_ALIVE = os.environ.get("LLM_KEEP_ALIVE", "30m")
+
+
+class ScoringBackend:
+    """Base class. Backends without a model never call an LLM."""
+    name = "base"
+    model = None
+
+    @property
+    def is_llm(self):
+        return self.model is not None
+
+    @property
+    def cache_id(self):
+        """Identifies results from this backend in the score cache"""
+        return f"{self.name}:{self.model}"
+
+    def chat(self, messages, **options):
+        raise NotImplementedError
+
+
+class OllamaBackend(ScoringBackend):
+    def __init__(self, name, host, model, api_key=None):
+        self.name = name
+        self.host = host
+        self.model = model
+        self.api_key = api_key
+
+    def chat(self, messages, **options):
+        if LLM_KEEP_ALIVE:
+            options.setdefault("keep_alive", LLM_KEEP_ALIVE)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = llm_client.chat(self.model, messages, host=self.host, api_key=self.api_key, **options)
+            outcome = "ok"
+            return response
+        except llm_client.CircuitOpenError:
+            outcome = "circuit_open"
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, backend=self.name, outcome=outcome)
+
+    def __repr__(self):
+        return f"<OllamaBackend(name={self.name}, host={self.host}, model={self.model})>"
+
+
+class KeywordBackend(ScoringBackend):
+    name = "keyword"
+
+    def __repr__(self):
+        return "<KeywordBackend()>"
+
+
+def _build_backends():
+    return {
+        "hosted": OllamaBackend(
+            "hosted",
+            llm_client.DEFAULT_HOST,
+            os.environ.get("OLLAMA_MODEL", "gpt-oss:120b"),
+            os.environ.get("OLLAMA_API_KEY", "")
+        ),
+        "local": OllamaBackend(
+            "local",
+            os.environ.get("LOCAL_OLLAMA_HOST", "http://localhost:11434"),
+            os.environ.get("LOCAL_OLLAMA_MODEL", "llama3.1:8b")
+        ),
+        "keyword": KeywordBackend(),
+        "mock": OllamaBackend(
+            "mock",
+            os.environ.get("MOCK_LLM_HOST", "http://127.0.0.1:11500"),
+            "mock"
+        ),
+    }
+
+
+BACKENDS = _build_backends()
+
+
+def get_backend(name=None):
+    """Look up a backend by name (default SCORING_BACKEND). Raises ValueError."""
+    name = name or SCORING_BACKEND
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scoring backend '{name}'. Available: {', '.join(BACKENDS)}")
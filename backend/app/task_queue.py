@@ -0,0 +1,365 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import and_, func, or_, select, update
+
+from .database import SessionLocal
+from .metrics import QUEUE_WAIT_SECONDS
+from .models import Job, JobTask
+
+logger = logging.getLogger(__name__)
+
+# A claimed task is invisible to other workers until its lease expires; a
+# worker that dies mid-task simply lets the lease lapse and the task is
+# picked up again on the next claim.
+TASK_LEASE_SECONDS = int(os.environ.get("TASK_LEASE_SECONDS", "300"))
+TASK_MAX_ATTEMPTS = int(os.environ.get("TASK_MAX_ATTEMPTS", "3"))
+# Long-running holders renew their lease this often, so work that outlasts
+# TASK_LEASE_SECONDS is not claimed a second time while still running
+TASK_RENEW_INTERVAL = TASK_LEASE_SECONDS / 3
+
+
+@contextmanager
+def keep_lease(renew, interval=TASK_RENEW_INTERVAL):
+    """
+    Call renew() every `interval` seconds in a background thread while the
+    block runs. Renewal stops once renew() returns False (the lease is lost).
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                if not renew():
+                    return
+            except Exception as e:
+                logger.error(f"Lease renewal failed: {e}")
+
+    thread = threading.Thread(target=run, name="lease-renewal", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def enqueue_tasks(db, job_id, file_paths, file_hashes=None, first_position=1):
+    """Add one pending task per file. The caller commits, so the job and its
+    tasks become visible to workers atomically."""
+    file_hashes = file_hashes or [None] * len(file_paths)
+    now = time.time()
+    for position, (path, file_hash) in enumerate(zip(file_paths, file_hashes), first_position):
+        db.add(JobTask(
+            job_id=job_id,
+            position=position,
+            file_path=path,
+            file_hash=file_hash,
+            status="pending",
+            attempts=0,
+            enqueued_at=now
+        ))
+
+
+def _claimable(now):
+    return or_(
+        JobTask.status == "pending",
+        and_(JobTask.status == "leased", JobTask.lease_expires_at < now)
+    )
+
+
+def _ready_jobs():
+    """Jobs whose file tasks may run: no pre-ranking needed, or already ranked"""
+    return select(Job.id).where(or_(
+        Job.prerank_top_k.is_(None),
+        Job.ranked_at.isnot(None)
+    ))
+
+
+def claim_ranking(worker_id, job_id=None):
+    """
+    Lease the pre-ranking step of one job that needs it. Returns
+    (job_id, owner), where owner identifies this lease to renew_ranking,
+    release_ranking and complete_ranking, or None. Pre-ranking uses the same
+    lease expiry as file tasks, and after TASK_MAX_ATTEMPTS claims it is
+    skipped: every file then goes to the LLM.
+    """
+    db = SessionLocal()
+    try:
+        now = time.time()
+        rankable = and_(
+            Job.prerank_top_k.isnot(None),
+            Job.ranked_at.is_(None),
+            Job.status == "processing",
+            or_(Job.rank_lease_expires_at.is_(None), Job.rank_lease_expires_at < now)
+        )
+        query = db.query(Job.id, Job.rank_attempts).filter(rankable)
+        if job_id is not None:
+            query = query.filter(Job.id == job_id)
+        job = query.order_by(Job.id).first()
+        if job is None:
+            return None
+
+        if (job.rank_attempts or 0) >= TASK_MAX_ATTEMPTS:
+            gave_up = db.execute(
+                update(Job)
+                .where(Job.id == job.id, rankable)
+                .values(ranked_at=now, rank_lease_expires_at=None, rank_lease_owner=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            if gave_up:
+                logger.warning(
+                    f"Gave up pre-ranking job {job.id} after {job.rank_attempts} attempts; "
+                    f"every file goes to the LLM"
+                )
+            return None
+
+        owner = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job.id, rankable)
+            .values(
+                rank_lease_owner=owner,
+                rank_lease_expires_at=now + TASK_LEASE_SECONDS,
+                rank_attempts=func.coalesce(Job.rank_attempts, 0) + 1
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if claimed:
+            logger.info(f"Worker {worker_id} claimed pre-ranking of job {job.id}")
+            return job.id, owner
+        return None
+    finally:
+        db.close()
+
+
+def _owned_ranking(job_id, owner):
+    return and_(Job.id == job_id, Job.rank_lease_owner == owner, Job.ranked_at.is_(None))
+
+
+def renew_ranking(job_id, owner):
+    """Extend a pre-ranking lease. Returns False if it was lost to another worker."""
+    db = SessionLocal()
+    try:
+        renewed = db.execute(
+            update(Job)
+            .where(_owned_ranking(job_id, owner))
+            .values(rank_lease_expires_at=time.time() + TASK_LEASE_SECONDS)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not renewed:
+            logger.warning(f"Lost pre-ranking lease on job {job_id}")
+        return bool(renewed)
+    finally:
+        db.close()
+
+
+def release_ranking(job_id, owner):
+    """Give up a failed pre-ranking lease so it is retried without waiting for expiry"""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Job)
+            .where(_owned_ranking(job_id, owner))
+            .values(rank_lease_expires_at=None, rank_lease_owner=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def complete_ranking(job_id, owner, local_scores):
+    """
+    Store pre-ranking results: local_scores maps task id -> local score for
+    files outside the top-K. Releases the job's file tasks to workers.
+    Returns False, writing nothing, if the lease now belongs to another
+    worker or the job was already ranked.
+    """
+    db = SessionLocal()
+    try:
+        completed = db.execute(
+            update(Job)
+            .where(_owned_ranking(job_id, owner))
+            .values(ranked_at=time.time(), rank_lease_expires_at=None, rank_lease_owner=None)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not completed:
+            db.rollback()
+            logger.warning(f"Lost pre-ranking lease on job {job_id}, discarding its ranks")
+            return False
+        # Same transaction as ranked_at, so no file task is claimed before
+        # its local score is in place
+        for task_id, local_score in local_scores.items():
+            db.execute(
+                update(JobTask)
+                .where(JobTask.id == task_id)
+                .values(local_score=local_score)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def claim_tasks(worker_id, limit=1, job_id=None):
+    """
+    Lease up to `limit` tasks belonging to a single job, oldest first.
+    Returns detached JobTask rows owned by this claim (possibly empty).
+    """
+    db = SessionLocal()
+    try:
+        now = time.time()
+        query = db.query(JobTask.job_id).filter(
+            _claimable(now), JobTask.job_id.in_(_ready_jobs())
+        )
+        if job_id is not None:
+            query = query.filter(JobTask.job_id == job_id)
+        first = query.order_by(JobTask.job_id, JobTask.position).first()
+        if first is None:
+            return []
+
+        candidate_ids = db.query(JobTask.id).filter(
+            JobTask.job_id == first.job_id, _claimable(now)
+        ).order_by(JobTask.position).limit(limit).scalar_subquery()
+
+        # The claimable condition is re-checked inside the UPDATE, so two
+        # workers racing for the same rows cannot both win them.
+        token = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+        db.execute(
+            update(JobTask)
+            .where(JobTask.id.in_(candidate_ids), _claimable(now))
+            .values(
+                status="leased",
+                lease_owner=token,
+                lease_expires_at=now + TASK_LEASE_SECONDS,
+                attempts=JobTask.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        tasks = db.query(JobTask).filter(
+            JobTask.lease_owner == token
+        ).order_by(JobTask.position).all()
+        db.expunge_all()
+        for task in tasks:
+            if task.attempts == 1 and task.enqueued_at is not None:
+                QUEUE_WAIT_SECONDS.observe(now - task.enqueued_at)
+        return tasks
+    finally:
+        db.close()
+
+
+def renew_tasks(tasks):
+    """
+    Extend the leases of a claimed batch while it is still being worked on.
+    Returns False once none of them is held by this claim any more.
+    """
+    db = SessionLocal()
+    try:
+        renewed = db.execute(
+            update(JobTask)
+            .where(
+                JobTask.id.in_([task.id for task in tasks]),
+                JobTask.lease_owner == tasks[0].lease_owner,
+                JobTask.status == "leased"
+            )
+            .values(lease_expires_at=time.time() + TASK_LEASE_SECONDS)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return bool(renewed)
+    finally:
+        db.close()
+
+
+def finish_task(db, task, status):
+    """
+    Mark a leased task done/failed in the caller's transaction; the caller
+    bumps Job.processed_files in the same transaction. Returns False if the
+    lease was lost (another worker reclaimed the task), in which case
+    nothing should be recorded.
+    """
+    finished = db.execute(
+        update(JobTask)
+        .where(JobTask.id == task.id, JobTask.lease_owner == task.lease_owner, JobTask.status == "leased")
+        .values(status=status, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not finished:
+        logger.warning(f"Lost lease on task {task.id} (job {task.job_id}), discarding result")
+        return False
+    return True
+
+
+def unfinished_count(db, job_id, file_path=None):
+    query = db.query(JobTask).filter(
+        JobTask.job_id == job_id,
+        JobTask.status.in_(("pending", "leased"))
+    )
+    if file_path is not None:
+        query = query.filter(JobTask.file_path == file_path)
+    return query.count()
+
+
+def files_in_use(db, pairs):
+    """Of the (job_id, file_path) pairs, those still read by an unfinished task"""
+    pairs = set(pairs)
+    if not pairs:
+        return set()
+    rows = db.query(JobTask.job_id, JobTask.file_path).filter(
+        JobTask.job_id.in_({job_id for job_id, _ in pairs}),
+        JobTask.file_path.in_({path for _, path in pairs}),
+        JobTask.status.in_(("pending", "leased"))
+    ).group_by(JobTask.job_id, JobTask.file_path)
+    return {(job_id, path) for job_id, path in rows} & pairs
+
+
+def finalize_job(db, job_id):
+    """
+    Set the final Job.status once every task has finished. Idempotent; jobs
+    still being ingested (status "ingesting") are left alone.
+    """
+    if unfinished_count(db, job_id):
+        return None
+
+    successful_count = db.query(JobTask).filter(
+        JobTask.job_id == job_id, JobTask.status == "done"
+    ).count()
+    failed_count = db.query(JobTask).filter(
+        JobTask.job_id == job_id, JobTask.status == "failed"
+    ).count()
+
+    if failed_count == 0:
+        status = "completed"
+    elif successful_count > 0:
+        status = "completed_with_errors"
+    else:
+        status = "failed"
+
+    finalized = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "processing")
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    if not finalized:
+        return None
+
+    if status == "completed":
+        logger.info(f"Job {job_id} completed successfully. Processed {successful_count} files.")
+    elif status == "completed_with_errors":
+        logger.info(f"Job {job_id} completed with {successful_count} successful and {failed_count} failed files.")
+    else:
+        logger.error(f"Job {job_id} failed. All {failed_count} files failed to process.")
+    return status
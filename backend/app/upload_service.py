@@ -0,0 +1,348 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+from .database import SessionLocal
+from .dedup import prune_fingerprints
+from .metrics import ORPHANED_UPLOADS_REMOVED
+from .models import Job, JobTask
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = {'.pdf', '.docx', '.doc'}
+
+UPLOAD_DIR = "uploads"
+STAGING_DIR = os.path.join(UPLOAD_DIR, "staging")
+UPLOAD_CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_FILE_BYTES = int(os.environ.get("MAX_UPLOAD_FILE_BYTES", str(10 * 1024 * 1024)))
+MAX_UPLOAD_REQUEST_BYTES = int(os.environ.get("MAX_UPLOAD_REQUEST_BYTES", str(100 * 1024 * 1024)))
+# Uploads up to this size are read into memory instead of a staging file;
+# larger ones spill to the staging area on disk. 0 stages every upload.
+UPLOAD_MEMORY_MAX_BYTES = int(os.environ.get("UPLOAD_MEMORY_MAX_BYTES", str(2 * 1024 * 1024)))
+# Every upload is still written to its path under UPLOAD_DIR: queued tasks
+# must survive a restart and may be claimed by workers in other processes.
+
+# The janitor removes uploads no unfinished task will read (left behind by
+# interrupted requests or crashed workers) once they are UPLOAD_ORPHAN_AGE
+# seconds old, checking every UPLOAD_JANITOR_INTERVAL seconds (0 disables it).
+# Staging files are only swept after a day, and never while an ingesting
+# job still reads them.
+UPLOAD_ORPHAN_AGE = float(os.environ.get("UPLOAD_ORPHAN_AGE", "3600"))
+UPLOAD_JANITOR_INTERVAL = float(os.environ.get("UPLOAD_JANITOR_INTERVAL", "600"))
+STAGING_ORPHAN_AGE = 24 * 3600
+
+
+def _mb(num_bytes):
+    return f"{num_bytes / (1024 * 1024):g}"
+
+
+def _too_large(detail):
+    return HTTPException(status_code=413, detail=detail)
+
+
+def _request_too_large(limit):
+    return _too_large(f"Upload exceeds the {_mb(limit)} MB request limit")
+
+
+def check_request_size(content_length, limit=MAX_UPLOAD_REQUEST_BYTES):
+    """Reject a request up front from its Content-Length, before the body is read"""
+    if not content_length:
+        return
+    try:
+        length = int(content_length)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if length > limit:
+        raise _request_too_large(limit)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware enforcing a request body limit per upload endpoint
+    before the multipart parser spools the body: the Content-Length header
+    is checked up front, and body bytes are counted as they arrive, so
+    chunked requests or ones without a length are cut off too. `limits`
+    maps each path to its maximum body size in bytes.
+    """
+
+    def __init__(self, app, limits=None):
+        self.app = app
+        self.limits = dict(limits or {"/start-job": MAX_UPLOAD_REQUEST_BYTES})
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            check_request_size(Headers(scope=scope).get("content-length"), limit)
+        except HTTPException as e:
+            response = JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside form parsing; FastAPI turns it into the response
+                    raise _request_too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def stage_upload(
+    file: UploadFile,
+    request_remaining: int,
+    max_file_bytes: int = MAX_UPLOAD_FILE_BYTES,
+    max_memory_bytes: int = UPLOAD_MEMORY_MAX_BYTES
+):
+    """
+    Read one upload in chunks, hashing it and enforcing the per-file and
+    remaining per-request byte limits as data arrives. Uploads up to
+    max_memory_bytes stay in memory, larger ones are streamed into the
+    staging area. Returns (staged, sha256_hex, size), where staged is the
+    upload's bytes or its staged path.
+    """
+    if file.size is not None and file.size > max_file_bytes:
+        raise _too_large(
+            f"File {file.filename} exceeds the {_mb(max_file_bytes)} MB limit"
+        )
+
+    digest = hashlib.sha256()
+    size = 0
+    memory = bytearray()
+    staged_path = None
+    buffer = None
+
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_file_bytes:
+                raise _too_large(
+                    f"File {file.filename} exceeds the {_mb(max_file_bytes)} MB limit"
+                )
+            if size > request_remaining:
+                raise _request_too_large(MAX_UPLOAD_REQUEST_BYTES)
+            digest.update(chunk)
+            if buffer is None and size <= max_memory_bytes:
+                memory += chunk
+                continue
+            if buffer is None:
+                # Past the in-memory limit: spill what we have and stream the rest
+                os.makedirs(STAGING_DIR, exist_ok=True)
+                staged_path = os.path.join(STAGING_DIR, f"{uuid.uuid4().hex}.part")
+                buffer = await aiofiles.open(staged_path, "wb")
+                await buffer.write(memory)
+                memory = None
+            await buffer.write(chunk)
+    except BaseException:
+        if buffer is not None:
+            await buffer.close()
+            discard_staged([staged_path])
+        raise
+
+    if buffer is None:
+        return bytes(memory), digest.hexdigest(), size
+    await buffer.close()
+    return staged_path, digest.hexdigest(), size
+
+
+def stage_stream(source, filename, max_file_bytes=MAX_UPLOAD_FILE_BYTES):
+    """
+    Synchronous stage_upload for an open binary stream, such as a ZIP
+    member: copies it to staging chunk by chunk. Returns (staged_path,
+    sha256_hex, size); raises ValueError if it exceeds max_file_bytes.
+    """
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    staged_path = os.path.join(STAGING_DIR, f"{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(staged_path, "wb") as buffer:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_file_bytes:
+                    raise ValueError(f"File {filename} exceeds the {_mb(max_file_bytes)} MB limit")
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        discard_staged([staged_path])
+        raise
+
+    return staged_path, digest.hexdigest(), size
+
+
+def commit_upload(job_id, staged, file_hash, filename):
+    """
+    Move a staged upload (or write an in-memory one) to its
+    content-addressed home, uploads/<job_id>/<sha256><ext>. Identical files
+    within a job share one path. Blocking: call it off the event loop.
+    """
+    job_dir = os.path.join(UPLOAD_DIR, str(job_id))
+    os.makedirs(job_dir, exist_ok=True)
+    ext = os.path.splitext(filename)[1].lower()
+    path = os.path.join(job_dir, f"{file_hash}{ext}")
+
+    if isinstance(staged, bytes):
+        if not os.path.exists(path):
+            with open(path, "wb") as buffer:
+                buffer.write(staged)
+    elif os.path.exists(path):
+        os.remove(staged)
+    else:
+        os.replace(staged, path)
+    return path
+
+
+def discard_staged(staged_paths):
+    for staged_path in staged_paths:
+        if isinstance(staged_path, bytes):
+            continue  # in-memory upload, nothing on disk
+        try:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+        except OSError as e:
+            logger.error(f"Failed to remove staged upload {staged_path}: {e}")
+
+
+def cleanup_uploaded_files(file_paths):
+    """Clean up uploaded files after processing"""
+    file_paths = list(file_paths)
+    if not file_paths:
+        return
+
+    for path in file_paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+                logger.info(f"Cleaned up file: {path}")
+        except Exception as e:
+            logger.error(f"Failed to cleanup file {path}: {e}")
+
+    # Uploads live in a per-job directory; drop it once it is empty
+    for job_dir in {os.path.dirname(path) for path in file_paths}:
+        try:
+            os.rmdir(job_dir)
+        except OSError:
+            pass
+
+
+# -----------------------------
+# JANITOR
+# -----------------------------
+def _old_files(directory, cutoff):
+    try:
+        with os.scandir(directory) as entries:
+            return [
+                entry.path for entry in entries
+                if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff
+            ]
+    except FileNotFoundError:
+        return []
+
+
+def sweep_orphaned_uploads(max_age=UPLOAD_ORPHAN_AGE):
+    """
+    Remove uploads older than max_age that no pending or leased task will
+    read, plus stale staging files. Jobs still being ingested are skipped.
+    Returns the number of uploads removed.
+    """
+    now = time.time()
+    cutoff = now - max_age
+    unfinished = JobTask.status.in_(("pending", "leased"))
+    removed = 0
+
+    db = SessionLocal()
+    try:
+        # Archives of ingests in progress (or waiting to be resumed) stay
+        ingest_sources = {
+            source for (source,) in
+            db.query(Job.ingest_source).filter(Job.status == "ingesting", Job.ingest_source.isnot(None))
+        }
+        stale = [
+            path for path in _old_files(STAGING_DIR, now - max(max_age, STAGING_ORPHAN_AGE))
+            if os.path.abspath(path) not in ingest_sources
+        ]
+        discard_staged(stale)
+        ORPHANED_UPLOADS_REMOVED.inc(len(stale), kind="staging")
+        removed += len(stale)
+
+        try:
+            job_dirs = [entry for entry in os.scandir(UPLOAD_DIR) if entry.is_dir() and entry.name.isdigit()]
+        except FileNotFoundError:
+            job_dirs = []
+        for job_dir in job_dirs:
+            old = _old_files(job_dir.path, cutoff)
+            if not old:
+                continue
+            job_id = int(job_dir.name)
+            if db.query(Job.status).filter(Job.id == job_id).scalar() == "ingesting":
+                # Archive members are written before their tasks are enqueued
+                continue
+            live = {
+                path for (path,) in
+                db.query(JobTask.file_path).filter(JobTask.job_id == job_id, unfinished)
+            }
+            orphans = [path for path in old if path not in live]
+            cleanup_uploaded_files(orphans)
+            ORPHANED_UPLOADS_REMOVED.inc(len(orphans), kind="disk")
+            removed += len(orphans)
+    finally:
+        db.close()
+
+    if removed:
+        logger.info(f"Janitor removed {removed} orphaned uploads")
+    return removed
+
+
+def _prune_fingerprints():
+    db = SessionLocal()
+    try:
+        prune_fingerprints(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _janitor_loop(stop_event):
+    while True:
+        try:
+            sweep_orphaned_uploads()
+        except Exception as e:
+            logger.error(f"Upload janitor error: {e}")
+        try:
+            _prune_fingerprints()
+        except Exception as e:
+            logger.error(f"Fingerprint pruning failed: {e}")
+        if stop_event.wait(UPLOAD_JANITOR_INTERVAL):
+            return
+
+
+def start_janitor(stop_event):
+    """
+    Sweep orphaned uploads and prune dedup fingerprints now and every
+    UPLOAD_JANITOR_INTERVAL seconds until stop_event is set
+    """
+    if UPLOAD_JANITOR_INTERVAL <= 0:
+        return None
+    janitor = threading.Thread(target=_janitor_loop, args=(stop_event,), name="upload-janitor", daemon=True)
+    janitor.start()
+    return janitor
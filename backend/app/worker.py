@@ -0,0 +1,116 @@
+"""
+Queue worker. Claims file-level tasks from the job_tasks table and runs them
+through the extraction/scoring pipeline.
+
+Run standalone with:  python -m app.worker --threads 4 [--metrics-port 9100]
+The API process also runs an embedded worker unless EMBEDDED_WORKER=0.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .database import migrate
+from .ingest import recover_ingests
+from .job_service import SCORING_CONCURRENCY, work_once
+from .result_writer import result_writer
+from .upload_service import start_janitor
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+WORKER_THREADS = int(os.environ.get("WORKER_THREADS", str(SCORING_CONCURRENCY)))
+WORKER_POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1.0"))
+# 0 disables the standalone worker's /metrics listener
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "0"))
+
+
+def _worker_loop(worker_id, stop_event):
+    logger.info(f"Worker {worker_id} started")
+    while not stop_event.is_set():
+        try:
+            if not work_once(worker_id):
+                stop_event.wait(WORKER_POLL_INTERVAL)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} error: {e}")
+            stop_event.wait(WORKER_POLL_INTERVAL)
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def start_workers(stop_event, threads=WORKER_THREADS, name="worker"):
+    """
+    Start `threads` daemon worker loops, plus the upload janitor; they exit
+    once stop_event is set
+    """
+    base_id = f"{name}-{socket.gethostname()}-{os.getpid()}"
+    workers = []
+    for n in range(max(1, threads)):
+        worker = threading.Thread(
+            target=_worker_loop,
+            args=(f"{base_id}-{n}", stop_event),
+            name=f"{name}-{n}",
+            daemon=True
+        )
+        worker.start()
+        workers.append(worker)
+    start_janitor(stop_event)
+    return workers
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", metrics.CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port):
+    """Expose this process's metrics for Prometheus on :port/metrics"""
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="worker-metrics", daemon=True).start()
+    logger.info(f"Serving worker metrics on :{port}/metrics")
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume analysis queue worker")
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS,
+                        help="concurrent task loops in this process")
+    parser.add_argument("--metrics-port", type=int, default=WORKER_METRICS_PORT,
+                        help="serve Prometheus metrics on this port (0 = off)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    migrate()
+    # Bulk ingests whose process died (API or CLI) continue here
+    recover_ingests()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    workers = start_workers(stop_event, args.threads)
+    while not stop_event.wait(1):
+        pass
+    for worker in workers:
+        worker.join(timeout=30)
+    result_writer.flush()
+
+
+if __name__ == "__main__":
+    main()
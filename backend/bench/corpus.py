@@ -0,0 +1,112 @@
+"""
+Synthetic resume corpus for benchmarks.
+
+Resumes are generated from a seeded RNG, so the same seed always yields the
+same files. Sizes are given in pages; a page holds about 45 lines of text.
+PDFs are written directly (one Helvetica text stream per page) so no PDF
+library is needed beyond what the app already uses to read them.
+"""
+import os
+import random
+
+from docx import Document
+
+LINES_PER_PAGE = 45
+
+FIRST_NAMES = ["Ann", "Ravi", "Maria", "Chen", "Olu", "Sofia", "Lukas", "Aisha", "Diego", "Mei", "Tom", "Priya"]
+LAST_NAMES = ["Lee", "Patel", "Garcia", "Wang", "Adeyemi", "Rossi", "Keller", "Khan", "Lopez", "Tanaka", "Brown", "Nair"]
+SKILLS = [
+    "python", "sql", "fastapi", "django", "react", "typescript", "docker", "kubernetes",
+    "aws", "gcp", "terraform", "spark", "airflow", "pandas", "numpy", "pytorch",
+    "postgresql", "redis", "kafka", "graphql", "java", "go", "rust", "c++"
+]
+FILLER = [
+    "Led a team delivering", "Designed and maintained", "Improved the performance of",
+    "Migrated legacy services to", "Built monitoring for", "Automated deployment of",
+    "Mentored engineers on", "Reduced costs of"
+]
+
+JOB_DESCRIPTION = (
+    "Senior backend engineer. Python, FastAPI, PostgreSQL, Redis and Docker "
+    "required; Kubernetes, AWS and Kafka are a plus. Experience designing APIs "
+    "and data pipelines with Airflow or Spark."
+)
+
+
+def resume_lines(rng, pages):
+    """Lines of one resume: name and contact header, then experience bullets"""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "Skills: " + ", ".join(rng.sample(SKILLS, 8)),
+        "Experience",
+    ]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append(f"- {rng.choice(FILLER)} {rng.choice(SKILLS)} and {rng.choice(SKILLS)} systems")
+    return lines
+
+
+def write_docx(path, lines):
+    document = Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, lines):
+    """Minimal multi-page PDF with one text stream per page"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    page_ids = [4 + 2 * n for n in range(len(pages))]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [" + " ".join(f"{i} 0 R" for i in page_ids).encode()
+           + f"] /Count {len(pages)} >>".encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id, page_lines in zip(page_ids, pages):
+        body = "BT /F1 10 Tf 14 TL 50 760 Td " + " ".join(
+            f"({_pdf_escape(line)}) Tj T*" for line in page_lines
+        ) + " ET"
+        stream = body.encode("latin-1", "replace")
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        ).encode()
+        objects[page_id + 1] = f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for number in sorted(objects):
+        out += f"{offsets[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(directory, count, pages=(1, 2, 5), formats=("pdf", "docx"), seed=0):
+    """
+    Write `count` resumes into `directory`, cycling through the page counts
+    and formats. Returns [(path, format, pages)].
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for n in range(count):
+        fmt = formats[n % len(formats)]
+        page_count = pages[(n // len(formats)) % len(pages)]
+        path = os.path.join(directory, f"resume_{n:04d}_{page_count}p.{fmt}")
+        lines = resume_lines(rng, page_count)
+        (write_pdf if fmt == "pdf" else write_docx)(path, lines)
+        corpus.append((path, fmt, page_count))
+    return corpus
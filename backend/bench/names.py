@@ -0,0 +1,173 @@
+"""
+Golden corpus and micro-benchmark for resume name extraction.
+
+    python -m bench.names            # check the golden corpus, then time it
+    python -m bench.names --update   # rewrite expected names from the current code
+
+bench/data/names_golden.json holds resume texts with the names that
+extract_name_from_text and the keyword fallback scorer produce for them.
+The check fails (exit status 1) on any difference, so refactors of the
+extractor can prove they keep its output. Only use --update for
+intentional behaviour changes. The timing compares the current extractor
+with the frozen pre-refactor copy in bench/names_baseline.py.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from .corpus import FIRST_NAMES, LAST_NAMES, SKILLS, resume_lines
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "names_golden.json")
+
+HEADERS = ["RESUME", "Curriculum Vitae", "Professional Profile", "CV", "Summary", "Objective", ""]
+CONTACT = [
+    "Email: {first}.{last}@example.com", "{first}{last}@mail.com", "Phone: +1 555 0100",
+    "{first}.{last}.{n}@corp.io", "j{n}.{last}.{first}@x.org", "Address: 12 Main St, Springfield",
+    "linkedin.com/in/{first}{last}", "Contact Information", "",
+]
+NAME_FORMS = [
+    "{First} {Last}", "{FIRST} {LAST}", "{First} {M}. {Last}", "{F}. {Last}", "{Last}, {F}.",
+    "Name: {First} {Last}", "Full Name: {first} {last}", "Candidate Name - {First} {Last}",
+    "{First} {Last}, PhD", "Dr. {First} {Last}", "{First}-{Other} {Last}", "{First} {Last} Email: x",
+    "{first} {last}", "{First} {Last} {Other} {Last}", "",
+]
+LINES = [
+    "Professional Experience", "Education", "Skills Overview", "Work History", "Software Engineer",
+    "Data Analyst at Acme", "Python Developer", "Projects", "Senior Backend Engineer", "Team Lead",
+    "B.Sc. Computer Science", "Github: github.com/someone", "Portfolio Website", "Certifications",
+]
+
+HAND_CASES = [
+    "", "short", "          \n\n   ", "John Smith",
+    "RESUME\nJohn Smith\nEmail: john.smith@example.com",
+    "Curriculum Vitae\nmaria garcia\nmaria.garcia@example.com",
+    "Name: jane doe\nExperience\n- Built things",
+    "Summary of qualifications\nContact: johndoe@example.com\nSkills: python",
+    "Objective\nreach me at j2.smith.doe@example.com",
+    "Experience Summary\nSoftware Engineer\nA. B. Cdef\nsomething else here",
+    "JOHN SMITH\nSoftware Engineer\njohn@example.com",
+    "Mary-Jane O'Neil\nData Scientist",
+    "John Q. Smith\nEngineer and builder of things",
+    "Smith, J.\nEngineer\nmore text here",
+    "J. Smith\nEngineer\nmore text here",
+    "Professional Experience\nSkills Overview\nWork History\nAnn Lee Email: ann@example.com",
+    "x" * 80 + "\nAnn Lee\n",
+    "profile\n\n\nRavi Patel\nravi.patel@example.com",
+    "Contact Information\nPhone 555\nChen Wang Resume\n",
+    "  indented Name: Olu Adeyemi\nEngineer",
+    "Python, SQL, Docker\nLead developer\ndiego.lopez@example.com\n",
+    "1234 5678\nabc def\n",
+]
+
+
+def _fill(template, rng):
+    first, last, other = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES)
+    return template.format(
+        first=first.lower(), last=last.lower(), First=first, Last=last, Other=other,
+        FIRST=first.upper(), LAST=last.upper(), F=first[0], M=other[0], n=rng.randint(1, 99)
+    )
+
+
+def build_texts(seed=0, count=400):
+    """Hand-written edge cases plus seeded combinations of resume header shapes"""
+    rng = random.Random(seed)
+    texts = list(HAND_CASES)
+    for n in range(count):
+        parts = []
+        for pool, chance in ((HEADERS, 0.4), (NAME_FORMS, 0.9), (CONTACT, 0.7), (LINES, 0.6), (CONTACT, 0.3)):
+            if rng.random() < chance:
+                parts.append(_fill(rng.choice(pool), rng))
+        if rng.random() < 0.2:
+            rng.shuffle(parts)
+        parts.extend(rng.choice(LINES) for _ in range(rng.randint(0, 4)))
+        parts.append("Skills: " + ", ".join(rng.sample(SKILLS, 5)))
+        if n % 10 == 0:
+            # Full-length resumes, as extract_text returns them
+            parts.extend(resume_lines(rng, rng.choice((1, 3)))[3:])
+        texts.append("\n".join(parts))
+    return texts
+
+
+def _current_names(text):
+    from app.llm_service import fallback_score_resume
+    from app.resume_parser import extract_name_from_text
+
+    return {
+        "name": extract_name_from_text(text),
+        "fallback_name": fallback_score_resume("python developer", text)["name"],
+    }
+
+
+def update():
+    cases = [{"text": text, **_current_names(text)} for text in build_texts()]
+    os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+    with open(GOLDEN_PATH, "w") as f:
+        json.dump(cases, f, indent=0)
+        f.write("\n")
+    print(f"Wrote {len(cases)} cases to {GOLDEN_PATH}")
+
+
+def check(cases):
+    mismatches = 0
+    for case in cases:
+        actual = _current_names(case["text"])
+        for key in ("name", "fallback_name"):
+            if actual[key] != case[key]:
+                mismatches += 1
+                print(f"MISMATCH {key}: expected {case[key]!r}, got {actual[key]!r} for {case['text'][:80]!r}")
+    print(f"{len(cases) - mismatches}/{len(cases)} golden cases match" if not mismatches else f"{mismatches} mismatches")
+    return mismatches == 0
+
+
+def _time_calls(extract, texts):
+    start = time.perf_counter()
+    for text in texts:
+        extract(text)
+    return (time.perf_counter() - start) / len(texts)
+
+
+def benchmark(cases, repeat):
+    """Time the current extractor against the frozen previous one, interleaved"""
+    from app.resume_parser import extract_name_from_text
+
+    from .names_baseline import extract_name_from_text as baseline_extract
+
+    texts = [case["text"] for case in cases]
+    agree = sum(baseline_extract(case["text"]) == case["name"] for case in cases)
+    print(f"baseline agrees on {agree}/{len(cases)} golden names")
+
+    timings = {"baseline": [], "current": []}
+    # Alternate short rounds so CPU frequency drift hits both equally
+    for _ in range(repeat):
+        timings["baseline"].append(_time_calls(baseline_extract, texts))
+        timings["current"].append(_time_calls(extract_name_from_text, texts))
+    baseline, current = (statistics.median(timings[key]) for key in ("baseline", "current"))
+    calls = repeat * len(texts)
+    print(f"extract_name_from_text: {calls} calls each, median of {repeat} rounds")
+    print(f"  baseline {baseline * 1e6:.1f} us/call")
+    print(f"  current  {current * 1e6:.1f} us/call ({baseline / current:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Name extraction golden corpus and micro-benchmark")
+    parser.add_argument("--update", action="store_true", help="rewrite the golden file from the current code")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.update:
+        update()
+        return
+
+    with open(GOLDEN_PATH) as f:
+        cases = json.load(f)
+    ok = check(cases)
+    benchmark(cases, args.repeat)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+End-to-end benchmarks for the resume pipeline.
+
+Run from backend/:
+
+    python -m bench.run                          # all suites, default corpus
+    python -m bench.run --suites extract,name --count 60 --pages 1,5,20
+    python -m bench.run --compare bench/results/a.json bench/results/b.json
+
+Suites:
+- extract: resume_parser.extract_text per file, split by format and pages
+- name:    extract_name_from_text over the extracted texts
+- score:   score_resume against the mock LLM server, SCORING_CONCURRENCY threads
+- e2e:     POST /start-job then poll /job-status through the ASGI app, with
+           queue workers in-process and the "mock" scoring backend
+
+Everything runs in a throwaway directory (database, uploads) against the
+deterministic mock LLM server, so runs are reproducible offline and in CI.
+Each suite reports throughput, p50/p95/p99 latency and peak RSS (the
+process high-water mark after the suite, plus extraction pool children).
+The report is written as JSON; --compare prints the change between two.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .corpus import JOB_DESCRIPTION, generate_corpus
+
+logger = logging.getLogger("bench")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_FILES_PER_JOB = 20
+E2E_POLL_INTERVAL = 0.05
+
+
+def _peak_rss_mb():
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # bytes on macOS, KB on Linux
+    return {"self": round(self_kb / scale, 1), "children": round(children_kb / scale, 1)}
+
+
+def summarize(latencies, wall_seconds):
+    """Throughput and latency percentiles for one measured run"""
+    values = np.asarray(latencies, dtype=float) * 1000
+    if not len(values):
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "wall_s": round(wall_seconds, 3),
+        "throughput_per_s": round(len(values) / wall_seconds, 2) if wall_seconds else None,
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+# -----------------------------
+# SUITES
+# -----------------------------
+def bench_extract(corpus, repeat):
+    from app.resume_parser import extract_text
+
+    latencies = []
+    groups = {}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path, fmt, pages in corpus:
+            _, elapsed = _timed(extract_text, path)
+            latencies.append(elapsed)
+            groups.setdefault(f"{fmt}_{pages}p", []).append(elapsed)
+    wall = time.perf_counter() - start
+
+    report = summarize(latencies, wall)
+    report["by_group"] = {
+        group: summarize(values, sum(values)) for group, values in sorted(groups.items())
+    }
+    return report
+
+
+def bench_name(texts, repeat):
+    from app.resume_parser import extract_name_from_text
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            _, elapsed = _timed(extract_name_from_text, text)
+            latencies.append(elapsed)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_score(texts, repeat, concurrency):
+    from app.llm_service import score_resume
+
+    # Distinct inputs per repeat, so the score cache (if enabled) never hits
+    inputs = [f"{text}\nref {n}" for n in range(repeat) for text in texts]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda text: _timed(score_resume, JOB_DESCRIPTION, text, "mock"), inputs))
+    report = summarize([elapsed for _, elapsed in results], time.perf_counter() - start)
+    report["fallbacks"] = sum(
+        1 for result, _ in results if str(result.get("summary", "")).startswith("Fallback")
+    )
+    return report
+
+
+async def _run_job(client, files):
+    """Submit one job and poll until it finishes. Returns (job latency, status poll latencies, status)."""
+    from app.main import FINAL_STATUSES
+
+    payload = [
+        ("files", (os.path.basename(path), open(path, "rb").read(), "application/octet-stream"))
+        for path in files
+    ]
+    start = time.perf_counter()
+    response = await client.post("/start-job", data={"jd": JOB_DESCRIPTION, "backend": "mock"}, files=payload)
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+
+    polls = []
+    while True:
+        poll_start = time.perf_counter()
+        status = (await client.get(f"/job-status/{job_id}")).json()
+        polls.append(time.perf_counter() - poll_start)
+        if status["status"] in FINAL_STATUSES:
+            return time.perf_counter() - start, polls, status["status"]
+        await asyncio.sleep(E2E_POLL_INTERVAL)
+
+
+async def _bench_e2e(corpus, jobs, threads):
+    import httpx
+    from app.database import migrate
+    from app.main import app
+    from app.worker import start_workers
+
+    # ASGITransport does not run the lifespan hook that sets up the schema
+    migrate()
+    paths = [path for path, _, _ in corpus]
+    per_job = min(MAX_FILES_PER_JOB, len(paths))
+
+    stop_event = threading.Event()
+    workers = start_workers(stop_event, threads, name="bench")
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            job_latencies, poll_latencies, statuses = [], [], []
+            start = time.perf_counter()
+            for n in range(jobs):
+                offset = (n * per_job) % len(paths)
+                files = (paths[offset:] + paths[:offset])[:per_job]
+                latency, polls, status = await _run_job(client, files)
+                job_latencies.append(latency)
+                poll_latencies.extend(polls)
+                statuses.append(status)
+            wall = time.perf_counter() - start
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=10)
+
+    report = summarize(job_latencies, wall)
+    report["files_per_s"] = round(jobs * per_job / wall, 2)
+    report["files_per_job"] = per_job
+    report["job_status"] = summarize(poll_latencies, sum(poll_latencies))
+    report["statuses"] = statuses
+    return report
+
+
+def bench_e2e(corpus, jobs, threads):
+    return asyncio.run(_bench_e2e(corpus, jobs, threads))
+
+
+# -----------------------------
+# REPORTS
+# -----------------------------
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+COMPARED_METRICS = ("throughput_per_s", "p50_ms", "p95_ms", "p99_ms")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{old.get('label')} ({old.get('git_commit')}) -> {new.get('label')} ({new.get('git_commit')})")
+    for suite, new_report in new["suites"].items():
+        old_report = old["suites"].get(suite)
+        if old_report is None:
+            continue
+        for metric in COMPARED_METRICS + ("peak_rss_mb",):
+            before, after = old_report.get(metric), new_report.get(metric)
+            if metric == "peak_rss_mb":
+                before, after = (before or {}).get("self"), (after or {}).get("self")
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"  {suite:<8} {metric:<17} {before:>10} -> {after:>10}  {change}")
+
+
+def _configure_environment(workdir, args):
+    """Point the app at a scratch database and the mock LLM before it is imported"""
+    from app.mock_llm_server import start_mock_server
+
+    server = start_mock_server(
+        port=0, latency=args.mock_latency, jitter=args.mock_jitter,
+        error_rate=args.mock_error_rate, seed=args.seed
+    )
+    os.chdir(workdir)
+    os.environ["MOCK_LLM_HOST"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["SCORING_BACKEND"] = "mock"
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault("EMBEDDED_WORKER", "0")
+    os.environ.setdefault("WORKER_POLL_INTERVAL", "0.05")
+    # Measure the pipeline, not the caches or the hosted-API rate limit
+    os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+    os.environ.setdefault("TEXT_CACHE_ENABLED", "0")
+    os.environ.setdefault("LLM_RATE_LIMIT", "0")
+    return server
+
+
+CONFIG_ENV = (
+    "DATABASE_URL", "DB_PROFILE", "WORKER_POLL_INTERVAL", "SCORING_CONCURRENCY",
+    "EXTRACTION_WORKERS", "LLM_BATCH_SIZE", "PRERANK_TOP_K", "LLM_CACHE_ENABLED",
+    "TEXT_CACHE_ENABLED", "LLM_RATE_LIMIT", "LLM_MAX_CONNECTIONS"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume pipeline benchmarks")
+    parser.add_argument("--suites", default="extract,name,score,e2e")
+    parser.add_argument("--count", type=int, default=24, help="resumes in the synthetic corpus")
+    parser.add_argument("--pages", default="1,2,5", help="comma-separated page counts to cycle through")
+    parser.add_argument("--formats", default="pdf,docx")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus for extract/name/score")
+    parser.add_argument("--jobs", type=int, default=3, help="jobs submitted by the e2e suite")
+    parser.add_argument("--concurrency", type=int, default=None, help="score threads / e2e worker threads")
+    parser.add_argument("--mock-latency", type=float, default=0.05)
+    parser.add_argument("--mock-jitter", type=float, default=0.02)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--output", default=None, help="report path (default bench/results/<label>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+    label = args.label or time.strftime("%Y%m%d-%H%M%S")
+    output = os.path.abspath(args.output or os.path.join(BENCH_DIR, "results", f"{label}.json"))
+
+    with tempfile.TemporaryDirectory(prefix="resume-bench-") as workdir:
+        cwd = os.getcwd()
+        server = _configure_environment(workdir, args)
+        try:
+            from app.job_service import SCORING_CONCURRENCY
+            concurrency = args.concurrency or SCORING_CONCURRENCY
+
+            corpus = generate_corpus(
+                os.path.join(workdir, "corpus"), args.count,
+                pages=[int(p) for p in args.pages.split(",")],
+                formats=args.formats.split(","),
+                seed=args.seed
+            )
+            from app.resume_parser import extract_text
+            texts = [extract_text(path) for path, _, _ in corpus]
+
+            report = {
+                "label": label,
+                "git_commit": _git_commit(),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": {k: v for k, v in vars(args).items() if k not in ("compare", "output")},
+                "config": {name: os.environ.get(name) for name in CONFIG_ENV},
+                "suites": {},
+            }
+
+            runners = {
+                "extract": lambda: bench_extract(corpus, args.repeat),
+                "name": lambda: bench_name(texts, args.repeat),
+                "score": lambda: bench_score(texts, args.repeat, concurrency),
+                "e2e": lambda: bench_e2e(corpus, args.jobs, concurrency),
+            }
+            for suite in suites:
+                if suite not in runners:
+                    parser.error(f"unknown suite '{suite}' (choose from {', '.join(runners)})")
+                logger.info(f"Running {suite}...")
+                result = runners[suite]()
+                result["peak_rss_mb"] = _peak_rss_mb()
+                report["suites"][suite] = result
+                logger.info(
+                    f"{suite}: {result.get('throughput_per_s')}/s, p50 {result.get('p50_ms')}ms, "
+                    f"p95 {result.get('p95_ms')}ms, p99 {result.get('p99_ms')}ms"
+                )
+        finally:
+            server.shutdown()
+            os.chdir(cwd)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
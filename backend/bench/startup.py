@@ -0,0 +1,101 @@
+"""
+Cold-start benchmark: how long importing the API (or worker) takes, and
+which heavy modules it pulls in.
+
+    python -m bench.startup                       # median of 5 fresh interpreters
+    python -m bench.startup --module app.worker
+    python -m bench.startup --max-ms 1200         # also fail above this import time
+
+Each run imports the module in a new interpreter under `python -X importtime`,
+inside a scratch directory so no database or upload folder is touched, and
+the slowest imports of the last run are listed. The check fails (exit
+status 1) if any of LAZY_MODULES is loaded at import: document parsers,
+NumPy/SciPy and the HTTP client are only loaded on first use.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ("pdfplumber", "pdfminer", "docx", "pypdfium2", "numpy", "scipy", "httpx")
+
+PROBE = "import json, sys, {module}; print(json.dumps([m for m in {lazy!r} if m in sys.modules]))"
+
+
+def parse_importtime(stderr):
+    """{module: (self us, cumulative us, depth)} from -X importtime output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # the column header
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports[name.strip()] = (self_us, cumulative_us, depth)
+    return imports
+
+
+def run_once(module, workdir):
+    """(interpreter wall seconds, importtime table, lazy modules that got loaded)"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BACKEND_DIR, env.get("PYTHONPATH")]))
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+    env["EMBEDDED_WORKER"] = "0"
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return wall, parse_importtime(result.stderr), json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time (cold start) benchmark")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median import takes longer")
+    args = parser.parse_args()
+
+    import_ms, wall_ms = [], []
+    with tempfile.TemporaryDirectory(prefix="resume-startup-") as workdir:
+        for _ in range(args.repeat):
+            wall, imports, loaded = run_once(args.module, workdir)
+            wall_ms.append(wall * 1000)
+            import_ms.append(imports[args.module][1] / 1000)
+
+    print(f"{args.module}: import {statistics.median(import_ms):.0f} ms, "
+          f"interpreter start to exit {statistics.median(wall_ms):.0f} ms (median of {args.repeat})")
+    print("Slowest imports (cumulative ms):")
+    children = [
+        (cumulative, name) for name, (_, cumulative, depth) in imports.items()
+        if depth <= 2 and name != args.module
+    ]
+    for cumulative, name in sorted(children, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+
+    ok = True
+    if loaded:
+        print(f"FAIL: loaded at import, should be lazy: {', '.join(loaded)}")
+        ok = False
+    if args.max_ms is not None and statistics.median(import_ms) > args.max_ms:
+        print(f"FAIL: median import {statistics.median(import_ms):.0f} ms exceeds {args.max_ms:.0f} ms")
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
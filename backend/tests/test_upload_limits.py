@@ -0,0 +1,71 @@
+import asyncio
+
+from app.ingest import BULK_MAX_ARCHIVE_BYTES
+from app.main import app
+from app.upload_service import UploadSizeLimitMiddleware
+
+BOUNDARY = "limit-test"
+
+
+def _multipart_chunks(chunk_size, count):
+    head = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="jd"\r\n\r\npython\r\n'
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="archive"; filename="a.zip"\r\n'
+        "Content-Type: application/zip\r\n\r\n"
+    ).encode()
+    yield head
+    for _ in range(count):
+        yield b"\0" * chunk_size
+
+
+def _post(asgi_app, path, chunks, content_length=None):
+    """Send a streamed POST; returns (status, number of body chunks read)"""
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": headers,
+        "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+    }
+    chunks = iter(chunks)
+    read = 0
+    sent = {}
+
+    async def receive():
+        nonlocal read
+        chunk = next(chunks, None)
+        if chunk is None:
+            return {"type": "http.request", "body": b"", "more_body": False}
+        read += 1
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+
+    asyncio.run(asgi_app(scope, receive, send))
+    return sent["status"], read
+
+
+def test_bulk_job_rejects_oversized_content_length():
+    status, read = _post(app, "/bulk-job", _multipart_chunks(1024, 4), BULK_MAX_ARCHIVE_BYTES + 1)
+    assert status == 413
+    assert read == 0
+
+
+def test_bulk_job_cuts_off_oversized_streamed_body():
+    limited = UploadSizeLimitMiddleware(app, limits={"/bulk-job": 64 * 1024})
+    status, read = _post(limited, "/bulk-job", _multipart_chunks(16 * 1024, 1000))
+    assert status == 413
+    # Stopped soon after the limit instead of reading the whole body
+    assert read < 10
+
+
+def test_start_job_keeps_its_own_limit():
+    limited = UploadSizeLimitMiddleware(app, limits={"/start-job": 64 * 1024, "/bulk-job": 1 << 30})
+    status, _ = _post(limited, "/start-job", _multipart_chunks(16 * 1024, 1000))
+    assert status == 413
@@ -3,6 +3,10 @@
 import { useState, useEffect, useRef } from "react";
 import axios from "axios";
 
+// LLM-scored candidates first, then those only scored by local pre-ranking
+const byRank = (a: any, b: any) =>
+  Number(!!a.scored_locally) - Number(!!b.scored_locally) || b.score - a.score;
+
 export default function Home() {
   const [jd, setJd] = useState("");
   const [files, setFiles] = useState<FileList | null>(null);
@@ -13,6 +17,7 @@ export default function Home() {
   const [error, setError] = useState<string | null>(null);
   const [llmStatus, setLlmStatus] = useState<"checking" | "available" | "unavailable">("checking");
   const intervalRef = useRef<NodeJS.Timeout | null>(null);
+  const eventSourceRef = useRef<EventSource | null>(null);
 
   const startJob = async () => {
     if (!files || !jd) {
@@ -26,11 +31,15 @@ export default function Home() {
       setResults([]);
       setProgress(0);
 
-      // Clear any existing polling
+      // Clear any existing polling or event stream
       if (intervalRef.current) {
         clearInterval(intervalRef.current);
         intervalRef.current = null;
       }
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close();
+        eventSourceRef.current = null;
+      }
 
       const formData = new FormData();
       formData.append("jd", jd);
@@ -53,7 +62,7 @@ export default function Home() {
       const id = res.data.job_id;
       setJobId(id);
 
-      pollStatus(id);
+      streamStatus(id);
     } catch (err) {
       console.error("Job start error:", err);
       setLoading(false);
@@ -77,12 +86,71 @@ export default function Home() {
     }
   };
 
+  // Push updates from /job-events; falls back to polling /job-status if the
+  // stream cannot be opened or drops.
+  const streamStatus = (id: number) => {
+    if (typeof EventSource === "undefined") {
+      pollStatus(id);
+      return;
+    }
+
+    const source = new EventSource(`http://127.0.0.1:8000/job-events/${id}`);
+    eventSourceRef.current = source;
+
+    const sortByScore = (rows: any[]) => [...rows].sort(byRank);
+    const applyProgress = (data: any) => {
+      const percent =
+        data.total === 0
+          ? 0
+          : (data.processed / data.total) * 100;
+      setProgress(percent);
+    };
+
+    source.addEventListener("snapshot", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      applyProgress(data);
+      setResults(sortByScore(data.candidates || []));
+    });
+
+    source.addEventListener("progress", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      applyProgress(data);
+      if (data.candidate) {
+        setResults((prev) =>
+          sortByScore([...prev.filter((c) => c.id !== data.candidate.id), data.candidate])
+        );
+      }
+    });
+
+    source.addEventListener("done", (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      source.close();
+      eventSourceRef.current = null;
+      if (data.status === "failed") {
+        setError("Job processing failed. Please try again.");
+      }
+      setLoading(false);
+    });
+
+    source.onerror = () => {
+      if (eventSourceRef.current !== source) {
+        return;
+      }
+      console.log("Event stream unavailable, falling back to polling");
+      source.close();
+      eventSourceRef.current = null;
+      pollStatus(id);
+    };
+  };
+
   const pollStatus = (id: number) => {
     let retryCount = 0;
     const maxRetries = 10;  // Increased max retries
     let consecutiveFailures = 0;
     let lastSuccessTime = Date.now();
     const maxConsecutiveFailures = 5;
+    // Only candidates added after this id are fetched on each poll
+    let cursor = 0;
     
     // Function to check server health
     const healthCheck = async () => {
@@ -97,7 +165,7 @@ export default function Home() {
     const poll = async () => {
       try {
         const res = await axios.get(
-          `http://127.0.0.1:8000/job-status/${id}`,
+          `http://127.0.0.1:8000/job-status/${id}?since=${cursor}`,
           {
             timeout: 10000,  // Increased timeout
           }
@@ -110,7 +178,14 @@ export default function Home() {
             : (data.processed / data.total) * 100;
 
         setProgress(percent);
-        setResults(data.candidates || []);
+        const fresh = data.candidates || [];
+        if (fresh.length > 0) {
+          setResults((prev) =>
+            [...prev.filter((c) => !fresh.some((f: any) => f.id === c.id)), ...fresh]
+              .sort(byRank)
+          );
+        }
+        cursor = data.cursor ?? cursor;
         retryCount = 0; // Reset retry count on success
         consecutiveFailures = 0; // Reset consecutive failures
         lastSuccessTime = Date.now();
@@ -218,6 +293,9 @@ export default function Home() {
       if (intervalRef.current) {
         clearInterval(intervalRef.current);
       }
+      if (eventSourceRef.current) {
+        eventSourceRef.current.close();
+      }
     };
   }, []);
 